@@ -1,16 +1,12 @@
 # Libraries, class and functions required to use
 import numpy as np
-import numpy.ma as ma
-import matplotlib
-import collections
-import matplotlib.pyplot as plt
 import math
-from scipy.spatial import ConvexHull, convex_hull_plot_2d
-from scipy.spatial import Voronoi, voronoi_plot_2d
-from collections import Counter
-from copy import deepcopy
-from EvenOrOdd import even
-from tqdm import trange
+from scipy.spatial import ConvexHull, QhullError
+from neighbours import Neighbours
+from population import Population, field
+from strip import region_check
+from movement import place_offspring, move
+from kernels import select, vital_rates, choose_actions
 
 
 class Colony():
@@ -24,6 +20,7 @@ class Colony():
 
 
     Attributes:
+    -> population:                              Structure-of-arrays store of the per-bacteria attributes below.
     -> points:                                  Coordinates of bacteria positions.
     -> relationship:                            The nature of the simulation dictating the interactions between colonies. 
                                                 Default value is 0 that means synergistic. 
@@ -32,6 +29,12 @@ class Colony():
     -> y_position:                              The intial y coordinate of the center of the colony.
     -> radius:                                  the inital radius of the colony
     -> neighbours:                              an array with pairs of the point indices and the number of the neighbours
+    -> neighbour_counter:                       incremental Delaunay neighbour counter of the colony
+    -> hull_cache:                              convex hull vertices and bounding box with the moves counter of the population
+                                                they belong to
+    -> rates_cache:                             population version, step and number of colonies of the current vital rates
+    -> rng:                                     random Generator of the colony (its own stream)
+    -> backend:                                 backend of the kernels: 'numpy' or 'numba' (see kernels.py)
     -> death_rate:                              an array with pairs of the point indices and the death rate
     -> k_duplicate:                             rate of duplication
     -> k_move:                                  rate of move
@@ -39,7 +42,7 @@ class Colony():
     -> birth_date:                              current step when the bacteria was born
     -> age:                                     step passing since bron for each bacteria
     -> strength:                                strenth of each bacteria based on the age, food and colony
-    -> actions:                                 a n_bacteria x 1 array for the action that the bacteria will take
+    -> actions:                                 a n_bacteria array for the action that the bacteria will take
     -> steps_eat:                               the steps passing after eating the food
     -> regions:                                 describes which region (coated / uncoated) the bacteria are in
 
@@ -51,16 +54,32 @@ class Colony():
     --- action:                                 assign actions for each bacteria
     --- k_die:                                  calculate death rate based on neighbours for bacteria
     --- duplicate:                              generate duplicated bacteria from orginial bacteria
+    --- breed:                                  place the duplicated bacteria (first part of duplicate)
+    --- feed_newborn:                           the duplicated bacteria eat (second part of duplicate)
     --- displacement:                           assign new positions for bacteria
     --- eat:                                    bacteria eat food
     --- die:                                    bacteria die and removed from the colony
     --- region_check:                           check in which region the bacteria are
     --- merge:                                  merge two synergistic colonies when they overlap
     --- strength_check:                         calculate the strength of each bacteria   
+    --- vital_rates:                            age, strength and death rate of each bacteria (cached)
+    --- hull:                                   convex hull and bounding box of the colony (cached)
     '''
 
+    # Per-bacteria attributes are views of the population store
+    points = field('points')
+    regions = field('regions')
+    actions = field('actions')
+    birth_date = field('birth_date')
+    ages = field('ages')
+    steps_eat = field('steps_eat')
+    neighbours = field('neighbours')
+    death_rate = field('death_rate')
+    strengths = field('strengths')
 
-    def create_colony(self, x_low, x_high, y_low, y_high, n_bacteria, radius, colony_index, relationship=0):
+
+    def create_colony(self, x_low, x_high, y_low, y_high, n_bacteria, radius, colony_index, relationship=0, rng=None,
+                      backend='numpy'):
         '''
         Description: 
         Create the intial round colony with a random position in the playground.
@@ -79,6 +98,9 @@ class Colony():
 
         Keyward arguments:
         -> relationship:                        0 (default)--- Synergistic; otherwise competitive
+        -> rng:                                 random stream of the colony: Generator, SeedSequence or seed (None: fresh
+                                                entropy). All random draws of the colony use it.
+        -> backend:                             backend of the kernels (see kernels.py)
 
 
         Return:
@@ -92,9 +114,13 @@ class Colony():
         yl = y_low + radius
         yh = x_high - radius
 
+        # Random stream of the colony
+        self.rng = np.random.default_rng(rng)
+        self.backend = backend
+
         # set the position of the colony
-        x_colony = np.random.uniform(xl, xh)                # x coordinate of the colony center
-        y_colony = np.random.uniform(yl, yh)                # y coordinate of the colony center
+        x_colony = self.rng.uniform(xl, xh)                 # x coordinate of the colony center
+        y_colony = self.rng.uniform(yl, yh)                 # y coordinate of the colony center
         position_colony = np.hstack([x_colony, y_colony])
 
         # Add attributes to Colony class
@@ -110,6 +136,9 @@ class Colony():
         self.x_position = position_colony[0]
         self.y_position = position_colony[1]
         self.radius = radius
+        self.neighbour_counter = Neighbours()
+        self.hull_cache = None
+        self.rates_cache = None
 
         return
     
@@ -141,15 +170,15 @@ class Colony():
         self.k_die_0 = k_die_0
 
         # Create all the position coordinates for the bacteria in the colony in polar form
-        angle = 2*math.pi * np.random.random((n_bacteria, 1))
-        r = self.radius * np.random.random((n_bacteria, 1))
+        angle = 2*math.pi * self.rng.random((n_bacteria, 1))
+        r = self.radius * self.rng.random((n_bacteria, 1))
         bacteria_x_positions = r * np.cos(angle) + self.x_position
         bacteria_y_positions = r * np.sin(angle) + self.y_position
         bacteria_positions = np.hstack([bacteria_x_positions, bacteria_y_positions])
         
-        # Add attributes
-        self.steps_eat = np.array([[np.inf] for i in range(n_bacteria)])
-        self.points = bacteria_positions
+        # Add attributes (steps_eat starts as Inf)
+        self.population = Population(n_bacteria)
+        self.population.append(n_bacteria, points=bacteria_positions)
         
         return bacteria_positions
 
@@ -157,7 +186,9 @@ class Colony():
     def calNeighbours(self):
         '''
         Describe:
-        Calculate the number of neighbours for the given bacteria.
+        Calculate the number of neighbours for the given bacteria. The Delaunay triangulation of the colony is updated
+        incrementally when bacteria are only appended, the counts left by die are used as they are when nothing else has
+        changed, and the triangulation is rebuilt when bacteria have moved (see neighbours.Neighbours).
         
 
         Positional arguments:
@@ -167,30 +198,8 @@ class Colony():
         Return
         None
         '''
-        # If the number of bacteria in the colony is more than 2:
-        if len(self.points) > 2:
-
-            vor = Voronoi(self.points)
-            neighbour_combin = vor.ridge_points   # Array containing paired point indices as neighbouring relationship
-            for_count = neighbour_combin.flatten().tolist()  # prepare for Counter
-            neighbours = Counter(for_count).items()   # count number of ocurrences as the neighbours
-            
-            # Sort the neighbours in the form of an array
-            neighbours = np.asarray(list(collections.OrderedDict(sorted(neighbours)).values()))
-            neighbours = neighbours.reshape(len(neighbours), 1)
-
-            self.neighbours = neighbours
-        
-        # fewer than 3
-        elif len(self.points) == 2:
-            
-            self.neighbours = np.ones((2, 1), dtype=np.int8)
-        
-        # only one bacteria
-        else:
-
-            self.neighbours = np.array([1], dtype=np.int8)
-
+        # Number of Delaunay edges of each bacteria (same as the number of Voronoi ridges)
+        self.neighbours = self.neighbour_counter.count(self.points)
 
         return
 
@@ -209,78 +218,36 @@ class Colony():
         None
         '''
 
-        # Denominator of the probability
-        sum_p = self.k_duplicate + self.k_move + self.death_rate
-
-        # Probability for each action
-        die_p = (self.death_rate / sum_p).reshape(len(self.points), 1)
-        duplicate_p = (self.k_duplicate / sum_p).reshape(len(self.points), 1)
-        move_p = (self.k_move / sum_p).reshape(len(self.points), 1)
-
-        # Pack three as a masked array    
-        mask_p = np.hstack([die_p, duplicate_p, move_p])
-
-        # Action list for all the bacteria in a colony
+        # One uniform draw for each bacteria compared with the cumulative probability
         # 1: die; 2: duplicate; 3: move
-        actions = np.array([[np.random.choice([1, 2, 3], p=mask_p[i])] for i in range(len(mask_p))])
+        u = self.rng.random(len(self.death_rate))
+        actions = select(choose_actions, self.backend)(self.death_rate, self.k_duplicate, self.k_move, u)
 
         self.actions = actions
 
         return 
 
 
-    def k_die(self, step):
+    def k_die(self, step, colonies):
         '''
         Describe:
-        Assigh each bacteria in the colony a death rate based on the neighbours of it.
+        Assigh each bacteria in the colony a death rate based on the neighbours of it. Bacteria which have eaten in the last
+        10 steps do not die.
 
         Positional arguments:
         -> self:
-        -> step:    the current step
+        -> step:        the current step
+        -> colonies:    colony dictionary
 
         Return
-        -> death_rate: an array with pairs of the point indice and the deat rate
+        None
         '''
-
-        # Create an empty list for death rate
-        death_rate = list()
-
-        # Steps after last eating
-        steps_pass = step - self.steps_eat
-
-        # First: if the bacteria never eats (nan), then logical_or returns False; 
-        # Second: if the steps passing from the last eating are more than 10 steps, then return True
-        # True: normal; False: 0
-        condition = np.logical_or(np.isinf(steps_pass), steps_pass > 10)
-
-        # k_die(x) for all the bacteria
-        k_die_x = self.k_die_0 / self.neighbours
-
-        # This is a small modification for solving neighour problem.
-        # Place duplicated bacteria closely beside their original bacteria
-        if len(k_die_x) != len(condition):
-
-            dimension = len(condition) - len(k_die_x)
-
-            modification = np.array([
-                [k_die_x[int(np.random.choice(list(range(len(k_die_x))), 1))]] 
-                for i in range(dimension)]).reshape(dimension, 1)
-            k_die_x = np.vstack([k_die_x, modification])
-        
-        else:
-
-            pass
-
-        # Set the k_die_x as zero for the bacteria that has eaten something
-        die_0 = np.zeros((len(condition), 1))
-        death_rate = np.where(condition, k_die_x, die_0)
-        
-        self.death_rate = death_rate
+        self.vital_rates(step, len(colonies))
 
         return
 
 
-    def duplicate(self, food_positions, eat_distance, step, vertices_y, 
+    def duplicate(self, food, eat_distance, step, vertices_y, 
                   born_radius, x_low, x_high, y_low, y_high, colonies
                   ):
         '''
@@ -291,7 +258,7 @@ class Colony():
 
         Positional arguments:
         -> self:
-        -> food_position:                       position of food
+        -> food:                                Food store
         -> eat_distance:                        distance in which bacteria can eat food
         -> step:                                current step
         -> vertices_y:                          playground information
@@ -306,137 +273,93 @@ class Colony():
         Return
         None
         '''
-        # preparation
-        old_n_bacteria = len(self.points)           # current number of bacteria
-        old_points = deepcopy(self.points)          # current bacteria positions
-        positions = deepcopy(self.points)           # a deepcopy of current bacteria positions
-
-        # Find the positions for the new bacteria
-        condition_2D = np.array([[True, True] if self.actions[i] == 2 else [False, False] for i in np.arange(len(self.actions))])
-        condition_1D = np.array([[True] if self.actions[i] == 2 else [False] for i in np.arange(len(self.actions))])
-
-        # If some bacteria require to duplicate
-        if True in condition_1D:
-
-            positions = np.extract(condition_2D, positions)
-            positions = positions.reshape(int(len(positions) / 2), 2)
-
-            # Place duplicated bacteria around the parent one
-            check = True
+        new_born = self.breed(step, vertices_y, born_radius, x_low, x_high, y_low, y_high, colonies)
 
-            while(check):
-                
-                # Positions of duplicated points
-                angle = 2*math.pi * np.random.random((len(positions), 1))
-                r = born_radius * np.random.random((len(positions), 1))
-                bacteria_x_positions = r * np.cos(angle) + positions[:, 0].reshape(len(positions), 1)
-                bacteria_y_positions = r * np.sin(angle) + positions[:, 1].reshape(len(positions), 1)
-                new_positions = np.hstack([bacteria_x_positions, bacteria_y_positions])
-                points_temp = np.vstack([old_points, new_positions])
+        # The new born bacteria will eat food
+        self.feed_newborn(new_born, food, eat_distance, step)
 
-                self.points = points_temp
-
-                # get regions of duplicated bacteria
-                old_regions = np.extract(condition_1D, self.regions)
-                old_regions = old_regions.reshape((len(old_regions), 1))
-                new_regions = self.region_check(vertices_y)[old_n_bacteria:]
-
-                displacement = new_regions - old_regions
-
-                # If the bacteria move more than one regions or it is in the coated region but moved out, return False. (Based on y coordinates)
-                condition_region_y = np.asarray([
-                    False if np.logical_or(abs(displacement[i]) > 1, np.logical_and(even(new_regions[i]), abs(displacement[i]) >= 1)) else True 
-                    for i in np.arange(len(displacement))
-                ]).reshape(len(displacement), 1)
-
-                # If the bacteria move out of strips horizontally, return false
-                condition_region_edge = np.asarray([
-                    False if np.logical_or(
-                                    np.logical_or(new_positions[i][0] < x_low, new_positions[i][0] > x_high),
-                                    np.logical_or(new_positions[i][1] < y_low, new_positions[i][1] > y_high)
-                                    )
-                    else True
-                    for i in np.arange(len(displacement))
-                ]).reshape(len(displacement), 1)
+        return
 
-                # Combine two conditions
-                condition_region = np.where(np.logical_and(condition_region_edge, condition_region_y), True, False)
 
-                if False in condition_region:      # duplicated bacteria cannot be in the uncoated regions if it is in coated ones.
-                                                   # also they cannot be out of the playground
+    def breed(self, step, vertices_y, born_radius, x_low, x_high, y_low, y_high, colonies):
+        '''
+        Describe:
+        First part of duplicate, which does not touch the food: place the new bacteria and give them neighbours and strength.
+        It only changes the colony, so the colonies can breed at the same time.
 
-                    pass
 
-                else:
+        Positional arguments:
+        -> self:
+        -> step:                                current step
+        -> vertices_y:                          playground information
+        -> born_radius:                         distance in which duplicated bacteria are
+        -> x_low:                               lowest limit of x-dimension of the playground
+        -> x_high:                              highest limit of x-dimension of the playground
+        -> y_low:                               lowest limit of y-dimension of the playground
+        -> y_high:                              highest limit of y-dimension of the playground
+        -> colonies:                            colony dictionary
 
-                    check = False
-            
 
-            # Add birth date
-            new_birth_date = np.zeros((len(new_positions), 1))
-            new_birth_date.fill(step)
-            self.birth_date = np.vstack([self.birth_date, new_birth_date])
+        Return
+        -> new_born:                            slice of the new bacteria in the population (empty if none)
+        '''
+        # Find the positions for the new bacteria
+        parents = np.flatnonzero(self.actions == 2)
 
-            # Add neighbours
-            self.calNeighbours()
+        # If no bacteria require to duplicate
+        if len(parents) == 0:
 
-            # Add steps passing after eating
-            steps_eat_new = np.array([[np.inf] for i in np.arange(len(positions))])
-            self.steps_eat = np.vstack([self.steps_eat, steps_eat_new])
+            return slice(len(self.points), len(self.points))
 
-            # Add strength
-            self.strength_check(step, colonies)
+        # Place duplicated bacteria around the parent one. Only rejected offspring are placed again.
+        # Duplicated bacteria cannot be in the uncoated regions if it is in coated ones.
+        # Also they cannot be out of the playground
+        new_positions, new_regions = place_offspring(self.points[parents], self.regions[parents], born_radius, vertices_y,
+                                                     x_low, x_high, y_low, y_high, self.rng)
 
-            # Add a action state for new born bacteria
-            new_actions = np.zeros((len(positions), 1))
-            self.actions = np.vstack([self.actions, new_actions])
+        # Add the new born bacteria with their birth date, regions and a pseudo action
+        # steps_eat starts as Inf; death rate starts as zero
+        new_born = self.population.append(len(new_positions), points=new_positions, regions=new_regions, birth_date=step)
 
-            # Add death rate
-            self.death_rate = np.vstack([self.death_rate, np.zeros((len(positions), 1))])
+        # Add neighbours
+        self.calNeighbours()
 
-            # The new born bacteria will eat food
-            if len(food_positions) == 0:
+        # Add strength
+        self.strength_check(step, colonies)
 
-                return food_positions
+        return new_born
 
-            else:
-            
-                for i in np.arange(len(new_positions)):
-                    
-                    # position of bacteria that needs to eat 
-                    target_bacteria = new_positions[i]
-                    n_food = food_positions.shape[0]
 
-                    # Calculate the distance between the chosen bacteria and all the food pieces
-                    distance = np.linalg.norm(target_bacteria - food_positions, axis=1)
+    def feed_newborn(self, new_born, food, eat_distance, step):
+        '''
+        Describe:
+        Second part of duplicate: the new bacteria eat the food around them. The food is shared by all the colonies, so the
+        colonies feed one after the other in the order of their keys.
 
-                    # Get an array of the food that the bacteria can eat   
-                    mask = [True if distance[i] > eat_distance else False for i in np.arange(n_food)]
-                    meun = distance[mask,...]
 
-                    # If there is avaiable food:
-                    if len(meun) != 0:
+        Positional arguments:
+        -> self:
+        -> new_born:                            slice of the new bacteria from breed
+        -> food:                                Food store
+        -> eat_distance:                        distance in which bacteria can eat food
+        -> step:                                current step
 
-                        # Randomly choose one to eat and this piece food will be removed from the food_positions
-                        food_eaten = np.random.choice(meun)
 
-                        # Remove the eaten piece food from the food_positions
-                        index = np.argwhere(distance == food_eaten)[0][0]
-                        food_positions = np.delete(food_positions, index, 0)
+        Return
+        None
+        '''
+        if new_born.start == new_born.stop:
 
-                        # Record the step when the bacteria eats the food
-                        self.steps_eat[i + old_n_bacteria] = int(step)
+            return
 
-                    else:
+        ate = food.eat(self.points[new_born], eat_distance, self.rng)
 
-                        pass
-            
-                return food_positions
+        # Record the step when the bacteria eats the food
+        self.steps_eat[new_born][ate] = step
+        self.population.touch()
 
-        else:
+        return
 
-            return food_positions
-        
 
     def displacement(self, mu, std, vertices_y, x_low, x_high, y_low, y_high):
         '''
@@ -457,74 +380,20 @@ class Colony():
         -> y_high:          highest limit of y-dimension of the playground
 
         
+        Return:
         None
         '''
-        # preparation
-        positions = deepcopy(self.points)
-
-        # Find the bacteria that is required to move
-        condition_action = np.array([[True if self.actions[i] == 3 else False] for i in range(len(self.points))])
-
-        # If some bacteria is required to move:
-        if True in condition_action:
-
-            # Add the movement to the bacteria that is required to move and keep the rest as the previous positions
-            # Displacement is based on the Gaussian distribution
-            # dy and dx are taken independently
-
-            new_position = np.where(condition_action, 
-                                    positions + np.hstack([np.random.normal(mu, std, 1) * np.cos(2*math.pi * np.random.random(1)), 
-                                                           np.random.normal(mu, std, 1) * np.sin(2*math.pi * np.random.random(1))
-                                                          ]), positions
-                                    )
-
-            # Get present regions for each bacteria:
-            old_regions = deepcopy(self.regions)
-
-            # Check if the movement is allowed based on the following principle:
-            # Bacteria in the coated region cannot move out the region 
-            # Bacteria in the uncoated region can move into other regions
-            # Get new regions of each bacteria after moving
-            new_regions = self.region_check(vertices_y)
-
-            displacement = new_regions - old_regions    # Check the movement between strips
-
-            # If the bacteria move more than one regions or it is in the coated region but moved out, return False. (Based on y coordinates)
-            condition_region_y = np.asarray([
-                False if np.logical_or(abs(displacement[i]) > 1, np.logical_and(even(new_regions[i]), abs(displacement[i]) >= 1)) else True 
-                for i in np.arange(len(displacement))
-            ]).reshape(len(self.points), 1)
-
-            # If the bacteria move out of strips horizontally, return false
-            condition_region_edge = np.asarray([
-                False if np.logical_or(
-                                np.logical_or(new_position[i][0] < x_low, new_position[i][0] > x_high),
-                                np.logical_or(new_position[i][1] < y_low, new_position[i][1] > y_high)
-                                )
-                else True
-                for i in np.arange(len(displacement))
-            ]).reshape(len(self.points), 1)
-
-            # Combine two conditions
-            condition_region = np.where(np.logical_and(condition_region_edge, condition_region_y), True, False)
-
-            # Reject unallowed movement and keep the rest.
-            final_position = np.where(condition_region, new_position, self.points)
-
-            # Obtain the final correct regions for bacteria
-            final_regions = np.where(condition_region, new_regions, old_regions)
-
-            self.points = final_position
-            self.regions = final_regions
-
-        else:
-
-            pass
+        # Each moving bacteria (3: move) takes its own step. Positions and regions are updated in place.
+        # Bacteria in the coated region cannot move out the region 
+        # Bacteria in the uncoated region can move into other regions
+        n_moved = move(self.points, self.regions, self.actions == 3, mu, std, vertices_y, x_low, x_high, y_low, y_high,
+                       self.rng, self.backend)
+        self.population.touch(moved=n_moved > 0)
 
         return
 
 
-    def eat(self, step, food_positions, eat_distance):
+    def eat(self, step, food, eat_distance):
         '''
         Describe:
         The bacteria eat the food in the eat distance and the current step is recorded.
@@ -533,44 +402,20 @@ class Colony():
         Positional arguments:
         -> self:
         -> step:              the present step of the simulation
-        -> food_positions:    an array containing food piece positions
+        -> food:              Food store containing food piece positions
         -> eat_distance:      the prey region of the bacteria (radius)
 
         Return:
-        -> food_positions: the updated food_positions array is required for other colonies
+        None
         '''
-        # If there is no food
-        if type(food_positions) == None:
-            return
-        
-        for i in np.arange(len(self.points)):
-
-            target_bacteria = self.points[i]
-            n_food = food_positions.shape[0]
-
-            # Calculate the distance between the chosen bacteria and all the food pieces
-            distance = np.linalg.norm(target_bacteria - food_positions, axis=1)
-
-            # Get an array of food that the bacteria can eat   
-            mask = [True if distance[i] > eat_distance else False for i in np.arange(n_food)]
-            meun = distance[mask,...]
-
-            # If there is avaiable food:
-            if len(meun) != 0:
-                # Randomly choose one to eat and this piece of food will be removed from the food_positions
-                food_eaten = np.random.choice(meun)
-
-                # Remove the eaten piece of food from the food_positions
-                index = np.argwhere(distance == food_eaten)[0][0]
-                food_positions = np.delete(food_positions, index, 0)
+        # All the bacteria in the colony eat in one batched pass
+        ate = food.eat(self.points, eat_distance, self.rng)
 
-                # Record the step when the bacteria eats the food
-                self.steps_eat[i] = int(step)
-            else:
-                pass
+        # Record the step when the bacteria eats the food
+        self.steps_eat[ate] = step
+        self.population.touch()
 
-
-        return food_positions
+        return
 
 
     def die(self):
@@ -585,56 +430,11 @@ class Colony():
         Return:
         None
         '''
-        
-        positions = deepcopy(self.points)
-
-        # Find the bacteria that will die
-        condition_die_2D = np.array([[False, False] if self.actions[i] == 1 else [True, True] for i in range(len(self.points))])
-        condition_die_1D = np.array([[False] if self.actions[i] == 1 else [True] for i in np.arange(len(self.points))])
-        condition_copy_1D = condition_die_1D.copy()
-
-        # If some bacteria require to die:
-        if False in condition_die_1D:
-
-            if self.relationship == 'Compeitive':
-
-                # Remove the dead bacteria from the colony with their information
-                positions = np.extract(condition_die_2D, positions)
-                positions = positions.reshape(int(positions.shape[0] / 2), 2)
-                self.points = positions
-
-                self.actions = np.extract(condition_copy_1D, self.actions)
-                self.actions.resize(len(condition_copy_1D), 1)
-                self.ages = np.extract(condition_copy_1D, self.ages)
-                self.ages.resize(len(condition_copy_1D), 1)
-                self.birth_date = np.extract(condition_copy_1D, self.birth_date)
-                self.birth_date.resize(len(condition_copy_1D), 1)
-                self.death_rate = np.extract(condition_copy_1D, self.death_rate)
-                self.death_rate.resize(len(condition_copy_1D), 1)
-                self.neighbours = np.extract(condition_copy_1D, self.neighbours)
-                self.neighbours.resize(len(condition_copy_1D), 1)
-                self.regions = np.extract(condition_copy_1D, self.regions)
-                self.regions.resize(len(condition_copy_1D), 1)
-                self.steps_eat = np.extract(condition_copy_1D, self.steps_eat)
-                self.steps_eat.resize(len(condition_copy_1D), 1)
-                self.strengths = np.extract(condition_copy_1D, self.strengths)
-                self.strengths.resize(len(condition_copy_1D), 1)
-
-        else:
-
-            for i in np.arange(len(condition_die_1D)):
-
-                if condition_die_1D[i] == False:
-
-                    self.actions = np.delete(self.actions, i, 0)
-                    self.death_rate = np.delete(self.death_rate, i, 0)
-                    self.neighbours = np.delete(self.neighbours, i, 0)
-                    self.regions = np.delete(self.regions, i, 0)
-                    self.steps_eat = np.delete(self.steps_eat, i, 0)
-                    self.strengths = np.delete(self.strengths, i ,0)
-                    self.birth_date = np.delete(self.birth_date, i, 0)
-                    self.ages = np.delete(self.ages, i, 0)
-        
+        # Remove all the dead bacteria (1: die) with their information in one compaction.
+        # The same for synergistic and competitive colonies.
+        keep = self.actions != 1
+        self.neighbour_counter.remove(keep)
+        self.population.compact(keep)
 
         return
     
@@ -647,26 +447,16 @@ class Colony():
 
         Positional arguments:
         -> self:
-        -> y_coordinates:    list containing y coordinates of the strip vertices
+        -> y_coordinates:    sorted y coordinates of the strip vertices
 
 
         Return:
-        None
+        -> region_array:     int8 array with the region of each bacteria
         '''
-        # preparation
-        y_range = deepcopy(self.points)
-        region_array = np.zeros((len(y_range), 1))
-        
-        # Determine the region where the bacteria is
+        # Determine the region where the bacteria is with a binary search
         # Odd number: uncoated; Even number: coated
         # Start from 1 (0, d2)
-        for i in range(len(y_range)):
-
-            y = y_range[i, 1]
-            y_copy = y_coordinates.copy()
-            y_copy.append(y)
-            index = sorted(y_copy).index(y)
-            region_array[i, 0] = index
+        region_array = region_check(self.points[:, 1], y_coordinates)
 
         self.regions = region_array
         
@@ -686,13 +476,7 @@ class Colony():
         None
         '''
 
-        self.points = np.vstack([self.points, colony.points])               # concatenate positions of points to the base target colony
-        self.steps_eat = np.vstack([self.steps_eat, colony.steps_eat])
-        self.regions = np.vstack([self.regions, colony.regions])
-        self.neighbours = np.vstack([self.neighbours, colony.neighbours])
-        self.ages = np.vstack([self.ages, colony.ages])
-        self.strengths = np.vstack([self.strengths, colony.strengths])
-        self.birth_date = np.vstack([self.birth_date, colony.birth_date])
+        self.population.extend(colony.population)           # concatenate all the bacteria to the base target colony
 
         return
 
@@ -712,14 +496,111 @@ class Colony():
         Return:
         None
         '''
-        # Steps passing since the bacteria was generated
-        ages = step - self.birth_date
+        self.vital_rates(step, len(colonies))
 
-        # strength function
-        strength = (10 / ages) + np.sqrt(len(colonies)) + (10 / (step - self.steps_eat))
+        return
 
-        self.strengths = strength
-        self.ages = ages
+
+    def vital_rates(self, step, n_colonies):
+        '''
+        Describe:
+        Age, strength and death rate of all the bacteria in one pass (see kernels.py). They only change with the bacteria, the
+        step and the number of colonies, so they are not computed again until one of them changes.
+
+
+        Positional arguments:
+        -> self:
+        -> step:            current step
+        -> n_colonies:      number of colonies
+
+
+        Return:
+        None
+        '''
+        key = (self.population.version, step, n_colonies)
+
+        if self.rates_cache != key:
+
+            kernel = select(vital_rates, self.backend)
+            self.ages, self.strengths, self.death_rate = kernel(step, self.birth_date, self.steps_eat, self.neighbours, n_colonies,
+                                                                self.k_die_0)
+            self.rates_cache = key
 
         return
-        
+
+
+    def hull(self):
+        '''
+        Describe:
+        Get the vertices of the convex hull of the colony in counterclockwise order and the bounding box of the colony. Both are
+        cached and only computed again when bacteria of the colony have been added, removed or moved. A colony with fewer than three bacteria, or
+        with all of them on one line, gives the two ends of the segment (or one point).
+
+
+        Positional arguments:
+        -> self:
+
+
+        Return:
+        -> vertices:        a n_vertices x 2 array of the convex hull vertices
+        -> box:             bounding box of the colony (x_min, y_min, x_max, y_max)
+        '''
+        version = self.population.moves
+
+        if self.hull_cache is None or self.hull_cache[0] != version:
+
+            self.hull_cache = (version,) + hull_vertices(self.points)
+
+        return self.hull_cache[1], self.hull_cache[2]
+
+
+def hull_vertices(points):
+    '''
+    Describe:
+    Vertices of the convex hull of a group of bacteria in counterclockwise order and their bounding box. Fewer than three bacteria,
+    or all of them on one line, give the two ends of the segment (or one point).
+
+
+    Positional arguments:
+    -> points:          a n_bacteria x 2 array of bacteria positions
+
+
+    Return:
+    -> vertices:        a n_vertices x 2 array of the convex hull vertices
+    -> box:             bounding box of the bacteria (x_min, y_min, x_max, y_max)
+    '''
+    try:
+
+        vertices = points[ConvexHull(points).vertices]
+
+    except (QhullError, ValueError):
+
+        # Fewer than three bacteria or all of them on one line: the hull is a segment or a point
+        vertices = segment(points)
+
+    return vertices, np.hstack([points.min(axis=0), points.max(axis=0)])
+
+
+def segment(points):
+    '''
+    Describe:
+    The two ends of the line formed by the bacteria, or one point if they are all at the same position.
+
+
+    Positional arguments:
+    -> points:          a n_bacteria x 2 array of bacteria positions
+
+
+    Return:
+    -> vertices:        a 2 x 2 (or 1 x 2) array
+    '''
+    distance = points - points[0]
+    far = np.argmax(np.einsum('ij,ij->i', distance, distance))
+
+    if not np.any(distance[far]):
+
+        return points[:1].copy()
+
+    projection = distance @ distance[far]
+
+    return points[[np.argmin(projection), np.argmax(projection)]]
@@ -1,32 +1,67 @@
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from main import main
-from tqdm import trange, tqdm
-import sys
 from strip import strip
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+from journal import Journal
+from simulation import BUDGET_STOPS
 
 
-def analysis(n_step, n_colony, n_bacteria, n_food,                                          
-            x_low, x_high, y_low, y_high, radius,                                          
+def analysis(n_step, n_colony, n_bacteria, n_food,
+            x_low, x_high, y_low, y_high, radius,
             eat_distance, k_die_0, k_duplicate, k_move, mu, std, born_radius,
             N_size, d_size, test_step,
-            relationship='Synergistic'):
+            relationship='Synergistic', workers=None, seed=None,
+            journal=None, checkpoint_dir=None, checkpoint_every=10, engine='colonies', backend='numpy',
+            threads=1, stop=None):
+    '''
+    Describe:
+    Run the simulation for every combination of N, d and d2 test_step times and collect the half lives. The simulations are
+    independent, so they are fanned out to a pool of processes. Each (strip, replicate) task gets its own random stream spawned
+    from one SeedSequence, so a sweep with a given seed gives the same results for any number of workers.
+
+    With a journal, each finished simulation is recorded on the disk at once and a restarted sweep skips the simulations already
+    recorded. With a checkpoint directory, each simulation also saves its state every checkpoint_every steps and resumes from it.
+
+
+    Positional arguments:
+    -> the parameters of main (see main.py)
+    -> test_step:               number of simulations for each combination of N, d and d2
+
+
+    Keyward arguments:
+    -> relationship:            relationship between colonies
+    -> workers:                 number of processes (None: all cores; 1: run in this process)
+    -> seed:                    seed of the sweep (None: fresh entropy)
+    -> journal:                 path of the SQLite journal of finished simulations (None: no journal)
+    -> checkpoint_dir:          directory for the checkpoints of running simulations (None: no checkpoint, except with a
+                                journal and a max_seconds or max_memory budget: '<journal>_checkpoints')
+    -> checkpoint_every:        number of steps between two checkpoints of a simulation
+    -> engine:                  'colonies' or 'world' (see simulation.Config)
+    -> backend:                 backend of the kernels: 'numpy' or 'numba' (see kernels.py)
+    -> threads:                 number of threads of each simulation (1: no thread pool; the sweep already runs the
+                                simulations in parallel)
+    -> stop:                    stopping rules of each simulation (see main.py), so the runs whose outcome is decided end
+                                early. None: no stopping rule.
+
+
+    Return:
+    -> half_life_df:            DataFrame with N, d, d2 and the half life and the stop reason of each simulation
+    '''
+    # Only the parent process of the sweep needs pandas and tqdm: the workers import nothing but the simulation
+    import pandas as pd
+    from tqdm import tqdm
 
     # Increment
     increment = (y_high) / (N_size * d_size)
 
-    # Set the recursion limit
-    sys.setrecursionlimit(3000)
-
     # Give the coated and uncoated regions on the playground
     vertices_y = strip(N_size, d_size, y_high, increment)
 
     # ***********************************************************************************************************************************
     # *************************************************************TEST******************************************************************
     # ***********************************************************************************************************************************
-    
+
     # Dataframe for T_1/2 storage
     col_N = np.asarray([[vertices_y[0][i][0]] for i in np.arange(len(vertices_y[0]))])          # column: N
     col_d = np.asarray([[vertices_y[0][i][1]] for i in np.arange(len(vertices_y[0]))])          # column: d
@@ -36,31 +71,183 @@ def analysis(n_step, n_colony, n_bacteria, n_food,
     info = np.hstack([col_N, col_d, col_d2, np.zeros(((N_size * d_size), test_step))])          # generate pre-data
     half_life_df = pd.DataFrame(info, columns=columns)                                          # generate dataframe
 
+    # Why each simulation stopped, next to its half life (see simulation.STOP_REASONS)
+    for i in range(test_step):
+
+        half_life_df.insert(half_life_df.columns.get_loc('step_T_1_2_{}'.format(i)) + 1, 'stop_reason_{}'.format(i), None)
+
+    # One task for each N, d and d2 combination and each replicate, with an independent random stream
+    tasks = [(strips, i) for strips in range(len(vertices_y[1])) for i in range(test_step)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    # The simulations stopped by a budget are resumed by the next sweep from their checkpoint, so a sweep with a journal and a
+    # budget always keeps checkpoints
+    budget = any((stop or dict()).get(rule) is not None for rule in ('max_seconds', 'max_memory'))
+
+    if checkpoint_dir is None and journal is not None and budget:
+
+        checkpoint_dir = os.path.splitext(journal)[0] + '_checkpoints'
+
+    # Skip the simulations already recorded in the journal
+    done = dict()
+
+    if journal is not None:
+
+        journal = Journal(journal)
+        done = journal.done()
+
+    for (strips, i), (step, stop_reason) in done.items():
+
+        half_life_df.loc[strips, ['step_T_1_2_{}'.format(i), 'stop_reason_{}'.format(i)]] = [step, stop_reason]
+
+    seeds = [task_seed for task, task_seed in zip(tasks, seeds) if task not in done]
+    tasks = [task for task in tasks if task not in done]
+
+    if checkpoint_dir is not None:
+
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    parameters = (n_step, n_colony, n_bacteria, n_food,
+                  x_low, x_high, y_low, y_high, radius,
+                  eat_distance, k_die_0, k_duplicate, k_move, mu, std, born_radius,
+                  N_size, d_size, increment, vertices_y)
+
+    if workers == 1:
+
+        # Run the tasks one by one in this process
+        for (strips, i), task_seed in zip(tqdm(tasks, desc='Task', unit='task'), seeds):
+
+            step, stop_reason = run_task(parameters, strips, i, relationship, task_seed,
+                                         checkpoint_path(checkpoint_dir, strips, i), checkpoint_every, engine, backend,
+                                         threads, stop)
+
+            # Add half life and stop reason to the dataframe
+            half_life_df.loc[strips, ['step_T_1_2_{}'.format(i), 'stop_reason_{}'.format(i)]] = [step, stop_reason]
+            finish_task(journal, checkpoint_dir, strips, i, step, stop_reason)
+
+    else:
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+
+            futures = {executor.submit(run_task, parameters, strips, i, relationship, task_seed,
+                                       checkpoint_path(checkpoint_dir, strips, i), checkpoint_every,
+                                       engine, backend, threads, stop): (strips, i)
+                       for (strips, i), task_seed in zip(tasks, seeds)}
+
+            # Add half lives to the dataframe as the simulations finish
+            for future in tqdm(as_completed(futures), total=len(futures), desc='Task', unit='task'):
 
-    # One N, d and d2 combination for the simulation
-    for strips in trange(len(vertices_y[1]), desc='Strip', unit='strip'):   # strips: a list containing y coordinates of strip vertices
+                strips, i = futures[future]
+                step, stop_reason = future.result()
+                half_life_df.loc[strips, ['step_T_1_2_{}'.format(i), 'stop_reason_{}'.format(i)]] = [step, stop_reason]
+                finish_task(journal, checkpoint_dir, strips, i, step, stop_reason)
 
-        # Run for number of test_step times for valid half lifes
-        for i in trange(test_step, desc='T_1_2', unit='unit'):
+    if journal is not None:
 
-            # Simulation function
-            step = main(n_step, n_colony, n_bacteria, n_food,                                          
-                        x_low, x_high, y_low, y_high, radius,                                          
-                        eat_distance, k_die_0, k_duplicate, k_move, mu, std, born_radius,
-                        N_size, d_size, increment, vertices_y, strips, i,
-                        relationship)
+        journal.close()
 
-            # Add half life to the dataframe
-            half_life_df.loc[strips, 'step_T_1_2_{}'.format(i)] = step
-        
 
     return half_life_df
 
 
-data = analysis(20, 5, 100, 2000,
-                0, 10, 0, 10, 2, 
-                1, 5, 5, 50, 0, 1, 0.001,
-                5, 5, 1, 'Synergistic')
+def run_task(parameters, strips, i, relationship, seed_sequence, checkpoint=None, checkpoint_every=10, engine='colonies',
+             backend='numpy', threads=1, stop=None):
+    '''
+    Describe:
+    Run one simulation of the sweep with its own random stream. Executed in the worker processes.
+
+
+    Positional arguments:
+    -> parameters:              parameters of main before strips
+    -> strips:                  index of the N, d and d2 combination
+    -> i:                       index of the replicate
+    -> relationship:            relationship between colonies
+    -> seed_sequence:           SeedSequence of the task
+
+
+    Keyward arguments:
+    -> checkpoint:              path of the checkpoint of the simulation (None: no checkpoint)
+    -> checkpoint_every:        number of steps between two checkpoints
+    -> engine:                  'colonies' or 'world' (see simulation.Config)
+    -> backend:                 backend of the kernels: 'numpy' or 'numba' (see kernels.py)
+    -> threads:                 number of threads of the simulation
+    -> stop:                    stopping rules of the simulation (see main.py)
+
+
+    Return:
+    -> step:                    half life of the simulation
+    -> stop_reason:             why the simulation stopped (see simulation.STOP_REASONS)
+    '''
+    result = main(*parameters, strips, i, relationship, checkpoint=checkpoint, checkpoint_every=checkpoint_every, verbose=False,
+                  seed=seed_sequence, engine=engine, backend=backend, threads=threads, stop=stop)
+
+    return result.half_life, result.stop_reason
+
+
+def checkpoint_path(checkpoint_dir, strips, i):
+    '''
+    Describe:
+    Path of the checkpoint of one simulation.
+
+
+    Positional arguments:
+    -> checkpoint_dir:          directory for the checkpoints (None: no checkpoint)
+    -> strips:                  index of the N, d and d2 combination
+    -> i:                       index of the replicate
+
+
+    Return:
+    -> path (None if there is no checkpoint directory)
+    '''
+    if checkpoint_dir is None:
+
+        return None
+
+    return os.path.join(checkpoint_dir, 'simulation_{0}_{1}.pkl'.format(strips, i))
+
+
+def finish_task(journal, checkpoint_dir, strips, i, step, stop_reason):
+    '''
+    Describe:
+    Record a finished simulation in the journal and remove its checkpoint, which is not needed any more. A simulation stopped
+    by a budget (BUDGET_STOPS) is not finished: it is not recorded and keeps its checkpoint, so a restarted sweep resumes it.
+
+
+    Positional arguments:
+    -> journal:                 Journal of the sweep (None: no journal)
+    -> checkpoint_dir:          directory for the checkpoints (None: no checkpoint)
+    -> strips:                  index of the N, d and d2 combination
+    -> i:                       index of the replicate
+    -> step:                    half life of the simulation
+    -> stop_reason:             why the simulation stopped
+
+
+    Return:
+    None
+    '''
+    if stop_reason in BUDGET_STOPS:
+
+        return
+
+    if journal is not None:
+
+        journal.record(strips, i, step, stop_reason)
+
+    path = checkpoint_path(checkpoint_dir, strips, i)
+
+    if path is not None and os.path.exists(path):
+
+        os.remove(path)
+
+    return
+
+
+if __name__ == '__main__':
+
+    data = analysis(20, 5, 100, 2000,
+                    0, 10, 0, 10, 2,
+                    1, 5, 5, 50, 0, 1, 0.001,
+                    5, 5, 1, 'Synergistic')
 
-# CSV from data exported
-data.to_csv(r'E:\Coding\bacteria\Data\Data_synergistic.csv', index=False)
\ No newline at end of file
+    # CSV from data exported
+    data.to_csv(r'E:\Coding\bacteria\Data\Data_synergistic.csv', index=False)
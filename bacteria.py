@@ -0,0 +1,289 @@
+'''
+Command line runner of the simulation.
+
+    python -m bacteria run config.toml [--seed S] [--output result.json] [--figure 'figure/fig_{step}.png'] [--headless]
+                                       [--trace trace.jsonl]
+    python -m bacteria sweep config.toml [--workers W] [--seed S] [--output half_lives.csv]
+    python -m bacteria bench [--sizes 100 1000 ...] [--backend numba] [--output bench.json] [--compare old.json]
+
+The config file (TOML, or YAML if PyYAML is installed) has the sections [simulation], [stop], [strips] and [sweep]: see
+config.toml.
+Every command accepts --profile PATH to save the cProfile statistics of the run.
+'''
+import argparse
+import json
+import sys
+
+
+def load_config(path):
+    '''
+    Describe:
+    Read a TOML or YAML config file.
+
+
+    Positional arguments:
+    -> path:                path of the config file
+
+
+    Return:
+    -> config:              dictionary with the sections simulation, stop, strips and sweep
+    '''
+    if path.endswith(('.yaml', '.yml')):
+
+        import yaml
+
+        with open(path) as file:
+
+            config = yaml.safe_load(file) or dict()
+
+    else:
+
+        import tomllib
+
+        with open(path, 'rb') as file:
+
+            config = tomllib.load(file)
+
+    for section in ('simulation', 'stop', 'strips', 'sweep'):
+
+        config.setdefault(section, dict())
+
+    return config
+
+
+def strips_of(config):
+    '''
+    Describe:
+    Strip vertices of all combinations of N, d and d2 given by the [strips] section.
+
+
+    Positional arguments:
+    -> config:              dictionary from load_config
+
+
+    Return:
+    -> vertices_y:          output of strip.strip
+    '''
+    from strip import strip
+
+    N_size = config['strips'].get('N_size', 5)
+    d_size = config['strips'].get('d_size', 5)
+    y_high = config['simulation'].get('y_high', 10)
+
+    return strip(N_size, d_size, y_high, y_high / (N_size * d_size))
+
+
+def run(args, config):
+    '''
+    Describe:
+    Run one simulation with the combination of strips given by [strips] strip.
+    '''
+    from simulation import Config, ProgressPrinter, make_simulation
+
+    vertices_y = strips_of(config)
+    index = config['strips'].get('strip', 0)
+    parameters = dict(config['simulation'])
+
+    if args.seed is not None:
+
+        parameters['seed'] = args.seed
+
+    settings = Config(vertices_y=vertices_y[1][index], **parameters, **config['stop'])
+
+    observers = list()
+
+    if not args.headless:
+
+        observers.append(ProgressPrinter())
+
+    if args.figure is not None and not args.headless:
+
+        from render import Renderer
+        observers.append(Renderer(args.figure, args.render_every))
+
+    profiler = None
+
+    if args.trace is not None:
+
+        from profiler import StepProfiler
+        profiler = StepProfiler()
+
+    result = make_simulation(settings, observers, profiler).run(progress=not args.headless)
+
+    if profiler is not None:
+
+        profiler.save(args.trace)
+
+    output = {'N': vertices_y[0][index][0], 'd': vertices_y[0][index][1], 'd2': vertices_y[0][index][2],
+              'half_life': result.half_life, 'steps': result.steps, 'population': result.population,
+              'n_colonies': result.n_colonies, 'overlap_rounds': result.overlap_rounds, 'stop_reason': result.stop_reason}
+
+    write_json(args.output, output)
+
+    return
+
+
+def sweep(args, config):
+    '''
+    Describe:
+    Run the sweep of analysis.analysis over all combinations of strips.
+    '''
+    from analysis import analysis
+
+    parameters = dict(config['simulation'])
+    relationship = parameters.pop('relationship', 'Synergistic')
+    options = dict(config['sweep'])
+    test_step = options.pop('test_step', 1)
+
+    # The seed of the sweep: --seed, else [sweep] seed, else [simulation] seed
+    seed = parameters.pop('seed', None)
+
+    if seed is not None:
+
+        options.setdefault('seed', seed)
+
+    if args.workers is not None:
+
+        options['workers'] = args.workers
+
+    if args.seed is not None:
+
+        options['seed'] = args.seed
+
+    half_life_df = analysis(N_size=config['strips'].get('N_size', 5), d_size=config['strips'].get('d_size', 5),
+                            test_step=test_step, relationship=relationship, stop=config['stop'], **parameters, **options)
+
+    if args.output is None:
+
+        print(half_life_df.to_string(index=False))
+
+    else:
+
+        half_life_df.to_csv(args.output, index=False)
+
+    return
+
+
+def bench(args, config):
+    '''
+    Describe:
+    Run the benchmarks of benchmark.py.
+    '''
+    import benchmark
+
+    results = {'kernels': benchmark.bench_kernels(sizes=args.sizes, repeat=args.repeat, backend=args.backend),
+               'runs': benchmark.bench_runs(repeat=args.repeat, backend=args.backend),
+               'import': benchmark.bench_import(repeat=args.repeat)}
+
+    if args.backend != 'numpy':
+
+        kernels, populations, identical = benchmark.equivalence(args.backend)
+        results['equivalence'] = {'kernels': kernels, 'populations': populations, 'identical': identical}
+
+    if args.output is None:
+
+        for name, rows in results['kernels'].items():
+
+            benchmark.print_results(name, rows)
+
+        benchmark.print_runs(results['runs'])
+
+        if 'equivalence' in results:
+
+            print('equivalence with numpy: largest difference {0}, same populations: {1}'.format(
+                  results['equivalence']['kernels'], results['equivalence']['identical']))
+
+    else:
+
+        benchmark.save_results(args.output, results)
+
+        if args.compare is not None:
+
+            benchmark.compare(args.compare, args.output)
+
+    return
+
+
+def write_json(path, output):
+    '''
+    Describe:
+    Write the output as JSON to a file, or print it if there is no path.
+    '''
+    text = json.dumps(output, indent=2, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+
+    if path is None:
+
+        print(text)
+
+    else:
+
+        with open(path, 'w') as file:
+
+            file.write(text + '\n')
+
+    return
+
+
+def parser():
+
+    parser = argparse.ArgumentParser(prog='python -m bacteria', description='Bacteria population on coated and uncoated strips.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name in ('run', 'sweep', 'bench'):
+
+        command = commands.add_parser(name)
+
+        if name != 'bench':
+
+            command.add_argument('config', help='TOML or YAML config file')
+            command.add_argument('--seed', type=int, default=None, help='seed of the random numbers')
+
+        command.add_argument('--output', default=None, help='output file (default: print)')
+        command.add_argument('--profile', default=None, help='save the cProfile statistics to this file')
+
+    commands.choices['run'].add_argument('--figure', default=None,
+                                         help="path of the figures, formatted with the step (default: headless)")
+    commands.choices['run'].add_argument('--render-every', type=int, default=0,
+                                         help='number of steps between two figures (0: only the final figure)')
+    commands.choices['run'].add_argument('--trace', default=None,
+                                         help='save the time of each phase of each step: .jsonl, .csv or .json (Chrome trace)')
+    commands.choices['run'].add_argument('--headless', action='store_true',
+                                         help='no figure, no progress bar and no printing per step')
+    commands.choices['bench'].add_argument('--sizes', type=int, nargs='+', default=(10**2, 10**3, 10**4, 10**5, 10**6),
+                                           help='numbers of bacteria in a colony')
+    commands.choices['bench'].add_argument('--repeat', type=int, default=3, help='number of runs of each benchmark')
+    commands.choices['bench'].add_argument('--backend', choices=('numpy', 'numba'), default='numpy',
+                                           help='backend of the kernels (numba: also check it against numpy)')
+    commands.choices['bench'].add_argument('--compare', default=None,
+                                           help='JSON file of an earlier benchmark to compare with (needs --output)')
+    commands.choices['sweep'].add_argument('--workers', type=int, default=None,
+                                           help='number of processes (default: all cores; 1: no pool)')
+
+    return parser
+
+
+def cli(argv=None):
+
+    args = parser().parse_args(argv)
+    sections = ('simulation', 'stop', 'strips', 'sweep')
+    config = load_config(args.config) if getattr(args, 'config', None) else {section: dict() for section in sections}
+    command = {'run': run, 'sweep': sweep, 'bench': bench}[args.command]
+
+    if args.profile is None:
+
+        command(args, config)
+
+    else:
+
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.runcall(command, args, config)
+        profile.dump_stats(args.profile)
+
+    return 0
+
+
+if __name__ == '__main__':
+
+    sys.exit(cli())
@@ -0,0 +1,522 @@
+import numpy as np
+import copy
+import json
+import os
+import platform
+import time
+import subprocess
+import sys
+from strip import strip, region_check
+from movement import move
+from Colony import Colony
+from food import drop_food, Food
+from overlap_checking import overlap
+from fight import fight
+from simulation import Config, make_simulation
+
+SIZES = (10**2, 10**3, 10**4, 10**5, 10**6)
+KERNELS = ('region_check', 'calNeighbours', 'eat', 'k_die', 'action', 'displacement', 'duplicate', 'die', 'overlap', 'fight')
+
+
+def timeit(function, repeat=5, setup=None):
+    '''
+    Describe:
+    Time a function and return the best wall time of several runs.
+
+
+    Positional arguments:
+    -> function:            function to time
+
+
+    Keyward arguments:
+    -> repeat:              number of runs
+    -> setup:               function called before each run and not timed. Its return value is passed to the timed function.
+                            None: the timed function takes no argument.
+
+
+    Return:
+    -> best wall time in seconds
+    '''
+    best = np.inf
+
+    for _ in range(repeat):
+
+        if setup is None:
+
+            start = time.perf_counter()
+            function()
+
+        else:
+
+            state = setup()
+            start = time.perf_counter()
+            function(state)
+
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def bench_move(sizes=(10**2, 10**3, 10**4, 10**5, 10**6), repeat=5, L=10, seed=0):
+    '''
+    Describe:
+    Time one call of the move kernel for synthetic populations of different sizes. The time per bacteria stays flat if the
+    cost of a step of movement is linear in the number of bacteria.
+
+
+    Keyward arguments:
+    -> sizes:               numbers of bacteria in a colony to test
+    -> repeat:              number of runs for each size
+    -> L:                   the dimension of the playground (square shape)
+    -> seed:                seed of the synthetic population
+
+
+    Return:
+    -> results:             list of (number of bacteria, best time in seconds, time per bacteria in ns)
+    '''
+    rng = np.random.default_rng(seed)
+    vertices_y = strip(5, 5, L, L / 25)[1][12]
+    results = list()
+
+    for n in sizes:
+
+        points = rng.uniform(0, L, (n, 2)).astype(np.float32)
+        regions = region_check(points[:, 1], vertices_y)
+        moving = rng.random(n) < 0.8
+
+        best = timeit(lambda: move(points, regions, moving, 0, 1, vertices_y, 0, L, 0, L, rng), repeat)
+        results.append((n, best, 1e9 * best / n))
+
+    return results
+
+
+def bench_import(modules=('simulation', 'main', 'analysis'), repeat=5,
+                 heavy=('matplotlib', 'pandas', 'tqdm')):
+    '''
+    Describe:
+    Time the import of the entry points in a fresh interpreter, which is the startup cost paid by every worker of a sweep.
+    The time comes from "python -X importtime", so the start of the interpreter itself is not counted. The heavy libraries
+    which are loaded by the import are listed: the simulation core should only load numpy and scipy.
+
+
+    Keyward arguments:
+    -> modules:             modules to import
+    -> repeat:              number of runs for each module
+    -> heavy:               libraries reported if they are loaded
+
+
+    Return:
+    -> results:             list of (module, best import time in seconds, heavy libraries loaded)
+    '''
+    results = list()
+    check = 'import sys; print(",".join(m for m in {0!r} if m in sys.modules))'.format(tuple(heavy))
+
+    for module in modules:
+
+        best = np.inf
+
+        for _ in range(repeat):
+
+            output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {0}; {1}'.format(module, check)],
+                                    capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+            # Last line of the report: cumulative time of the module in microseconds
+            best = min(best, int(output.stderr.strip().splitlines()[-1].split('|')[1]) * 1e-6)
+
+        results.append((module, best, output.stdout.strip()))
+
+    return results
+
+
+def synthetic_colonies(n, n_colony=1, seed=0, step=10, backend='numpy'):
+    '''
+    Describe:
+    Build synthetic colonies with n bacteria each, ready for any kernel of a step: regions, neighbours, birth dates, steps
+    since eating, death rates and actions are all set. The playground grows with n so that the density of bacteria and food
+    stays the one of the default simulation (500 bacteria and 2000 pieces of food on 10 x 10), which keeps the time per
+    bacteria comparable between sizes.
+
+
+    Positional arguments:
+    -> n:                   number of bacteria in each colony
+
+
+    Keyward arguments:
+    -> n_colony:            number of colonies (they overlap)
+    -> seed:                seed of the synthetic colonies
+    -> step:                current step of the synthetic state
+    -> backend:             backend of the kernels of the colonies (see kernels.py). The compiled kernels are compiled (or
+                            loaded from the disk cache) when the colonies are built, so a benchmark does not time it.
+
+
+    Return:
+    -> colonies:            colony dictionary
+    -> food:                Food store
+    -> world:               dictionary with L, vertices_y, step, eat_distance and rng
+    '''
+    rng = np.random.default_rng(seed)
+    L = 10 * np.sqrt(n * n_colony / 500)
+    vertices_y = strip(5, 5, L, L / 25)[1][12]
+    food = Food(drop_food(4 * n * n_colony, 0, L, 0, L, rng), backend)
+    colonies = dict()
+
+    for i in range(n_colony):
+
+        colony = Colony()
+        colony.create_colony(0, L, 0, L, n, L / 4, i + 1, 'Competitive', rng.spawn(1)[0], backend)
+        colony.bacteria_preparation(n, 5, 50, 5)
+        colony.region_check(vertices_y)
+        colony.calNeighbours()
+        colony.birth_date = rng.integers(0, step, n)
+        colony.steps_eat = np.where(rng.random(n) < 0.5, np.inf, rng.integers(0, step, n))
+        colonies[i] = colony
+
+    for colony in colonies.values():
+
+        colony.strength_check(step, colonies)
+        colony.action()
+
+    world = {'L': L, 'vertices_y': vertices_y, 'step': step, 'eat_distance': 0.25, 'rng': rng}
+
+    return colonies, food, world
+
+
+def kernel(name, colonies, food, world):
+    '''
+    Describe:
+    The call of one kernel of a step on synthetic colonies.
+
+
+    Positional arguments:
+    -> name:                name of the kernel (see KERNELS)
+    -> colonies:            colony dictionary
+    -> food:                Food store
+    -> world:               dictionary from synthetic_colonies
+
+
+    Return:
+    None
+    '''
+    L, vertices_y, step, rng = world['L'], world['vertices_y'], world['step'], world['rng']
+    colony = colonies[0]
+
+    if name == 'region_check':
+
+        colony.region_check(vertices_y)
+
+    elif name == 'calNeighbours':
+
+        colony.calNeighbours()
+
+    elif name == 'eat':
+
+        colony.eat(step, food, world['eat_distance'])
+
+    elif name == 'k_die':
+
+        # Time the kernel, not the cache
+        colony.rates_cache = None
+        colony.k_die(step, colonies)
+
+    elif name == 'action':
+
+        colony.action()
+
+    elif name == 'displacement':
+
+        colony.displacement(0, 1, vertices_y, 0, L, 0, L)
+
+    elif name == 'duplicate':
+
+        colony.duplicate(food, world['eat_distance'], step, vertices_y, 0.001, 0, L, 0, L, colonies)
+
+    elif name == 'die':
+
+        colony.die()
+
+    elif name == 'overlap':
+
+        overlap(step, colonies, 'Synergistic', step, rng)
+
+    elif name == 'fight':
+
+        fight(step, colonies, [(0, 1)], step, rng)
+
+    return
+
+
+def bench_kernels(kernels=KERNELS, sizes=SIZES, repeat=3, seed=0, backend='numpy'):
+    '''
+    Describe:
+    Time each kernel of a step on synthetic colonies of different sizes. Every run starts from a fresh copy of the same
+    synthetic state (the copy is not timed), so kernels which change the colonies or eat the food are timed fairly. The
+    neighbour counter of the copy is empty, so calNeighbours and duplicate build the triangulation as they do after the
+    bacteria moved. The other kernels work on one colony of n bacteria; overlap merges two overlapping colonies of n bacteria
+    and fight settles one round between them.
+
+
+    Keyward arguments:
+    -> kernels:             names of the kernels to time
+    -> sizes:               numbers of bacteria to test
+    -> repeat:              number of runs for each kernel and size
+    -> seed:                seed of the synthetic colonies
+    -> backend:             backend of the kernels (see synthetic_colonies)
+
+
+    Return:
+    -> results:             dictionary: kernel -> list of (number of bacteria, best time in seconds, time per bacteria in ns)
+    '''
+    results = {name: list() for name in kernels}
+
+    for n in sizes:
+
+        n_colony = 2 if {'overlap', 'fight'} & set(kernels) else 1
+        state = synthetic_colonies(n, n_colony, seed, backend=backend)
+
+        for name in kernels:
+
+            best = timeit(lambda copied: kernel(name, *copied), repeat, setup=lambda: copy.deepcopy(state))
+
+            results[name].append((n, best, 1e9 * best / n))
+
+    return results
+
+
+def bench_runs(relationships=('Synergistic', 'Competitive'), engines=('colonies', 'world'), n_step=10, repeat=3, seed=0,
+               **parameters):
+    '''
+    Describe:
+    Time complete headless simulations with the default parameters of Config.
+
+
+    Keyward arguments:
+    -> relationships:       relationships to run
+    -> engines:             engines to run (see Config)
+    -> n_step:              number of steps of each simulation
+    -> repeat:              number of runs for each relationship
+    -> seed:                seed of the simulations (the same for all runs)
+    -> parameters:          other parameters of Config
+
+
+    Return:
+    -> results:             dictionary: 'relationship/engine' -> (best time in seconds, steps run, final population)
+    '''
+    vertices_y = strip(5, 5, 10, 10 / 25)[1][12]
+    results = dict()
+
+    for relationship in relationships:
+
+        for engine in engines:
+
+            config = Config(n_step=n_step, vertices_y=vertices_y, relationship=relationship, seed=seed, engine=engine,
+                            **parameters)
+            outcome = list()
+
+            best = timeit(lambda: outcome.append(make_simulation(config).run()), repeat)
+
+            results['{0}/{1}'.format(relationship, engine)] = (best, outcome[-1].steps, outcome[-1].population)
+
+    return results
+
+
+def equivalence(backend='numba', reference='numpy', n=10**4, runs=20, n_step=10, seed=0, **parameters):
+    '''
+    Describe:
+    Check that a backend gives the results of the reference backend. Each kernel with a compiled version runs on copies of
+    the same synthetic colony with both backends: as they consume the same random draws, the largest difference of the
+    attributes they write should be zero. Then complete simulations with different seeds run with both backends: with the
+    same seed they draw the same numbers, so their final populations should be the same.
+
+
+    Keyward arguments:
+    -> backend:             backend to check
+    -> reference:           reference backend
+    -> n:                   number of bacteria of the synthetic colony
+    -> runs:                number of simulations with each backend
+    -> n_step:              number of steps of each simulation
+    -> seed:                seed of the synthetic colony and of the simulations
+    -> parameters:          other parameters of Config
+
+
+    Return:
+    -> kernels:             dictionary: kernel -> largest absolute difference of the attributes it writes
+    -> populations:         dictionary: backend -> final population of each simulation
+    -> identical:           True if every simulation ends with the same population with both backends
+    '''
+    written = {'k_die': ('ages', 'strengths', 'death_rate'), 'action': ('actions',), 'displacement': ('points', 'regions')}
+    kernels = dict()
+
+    for name, attributes in written.items():
+
+        outputs = list()
+
+        for name_backend in (reference, backend):
+
+            colonies, food, world = synthetic_colonies(n, seed=seed, backend=name_backend)
+
+            kernel(name, colonies, food, world)
+
+            outputs.append([np.asarray(getattr(colonies[0], attribute), dtype=float) for attribute in attributes])
+
+        kernels[name] = max(np.max(np.abs(np.nan_to_num(new - old)), initial=0) for old, new in zip(*outputs))
+
+    vertices_y = strip(5, 5, 10, 10 / 25)[1][12]
+    populations = dict()
+
+    for name_backend in (reference, backend):
+
+        populations[name_backend] = list()
+
+        # The same seeds for both backends (a SeedSequence changes when it spawns, so new ones are made for each backend)
+        for run_seed in np.random.SeedSequence(seed).spawn(runs):
+
+            config = Config(n_step=n_step, vertices_y=vertices_y, seed=run_seed, backend=name_backend, **parameters)
+
+            populations[name_backend].append(make_simulation(config).run().population)
+
+    return kernels, populations, populations[reference] == populations[backend]
+
+
+def environment():
+    '''
+    Describe:
+    Description of the code and the machine a benchmark ran on, stored with the results.
+    '''
+    try:
+
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+
+        commit = None
+
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'machine': platform.machine(), 'processor': platform.processor()}
+
+
+def save_results(path, results):
+    '''
+    Describe:
+    Save the benchmark results as JSON together with the environment.
+
+
+    Positional arguments:
+    -> path:                path of the JSON file
+    -> results:             dictionary of the results of the benchmarks
+
+
+    Return:
+    None
+    '''
+    with open(path, 'w') as file:
+
+        json.dump({'environment': environment(), **results}, file, indent=2)
+        file.write('\n')
+
+    return
+
+
+def compare(old, new):
+    '''
+    Describe:
+    Compare the kernel and run times of two JSON files from save_results (for example from two commits) and print the ratio
+    new / old: below 1 is faster.
+
+
+    Positional arguments:
+    -> old:                 path of the reference JSON file
+    -> new:                 path of the new JSON file
+
+
+    Return:
+    -> ratios:              dictionary: (kernel, number of bacteria) or (relationship, None) -> new time / old time
+    '''
+    with open(old) as file:
+
+        old = json.load(file)
+
+    with open(new) as file:
+
+        new = json.load(file)
+
+    ratios = dict()
+
+    for name, rows in new.get('kernels', dict()).items():
+
+        reference = {n: best for n, best, _ in old.get('kernels', dict()).get(name, list())}
+        ratios.update({(name, n): best / reference[n] for n, best, _ in rows if reference.get(n)})
+
+    for relationship, (best, _, _) in new.get('runs', dict()).items():
+
+        if relationship in old.get('runs', dict()):
+
+            ratios[(relationship, None)] = best / old['runs'][relationship][0]
+
+    print('{0} -> {1}'.format(old['environment']['commit'], new['environment']['commit']))
+
+    for (name, n), ratio in ratios.items():
+
+        print('{0:>14s} {1:>10s}: {2:6.2f}x'.format(name, '' if n is None else str(n), ratio))
+
+    return ratios
+
+
+def print_results(title, results):
+    '''
+    Describe:
+    Print the benchmark results as a table.
+
+
+    Positional arguments:
+    -> title:               name of the benchmark
+    -> results:             list of (number of bacteria, best time in seconds, time per bacteria in ns)
+
+
+    Return:
+    None
+    '''
+    print(title)
+
+    for n, best, per_bacteria in results:
+
+        print('{0:>10d} bacteria: {1:10.3f} ms  {2:8.1f} ns/bacteria'.format(n, 1e3 * best, per_bacteria))
+
+    return
+
+
+def print_runs(results):
+    '''
+    Describe:
+    Print the times of the complete simulations.
+
+
+    Positional arguments:
+    -> results:             dictionary from bench_runs
+
+
+    Return:
+    None
+    '''
+    print('runs')
+
+    for relationship, (best, steps, population) in results.items():
+
+        print('{0:>22s}: {1:10.3f} s  {2} steps  {3} bacteria'.format(relationship, best, steps, population))
+
+    return
+
+
+if __name__ == '__main__':
+
+    for name, rows in bench_kernels().items():
+
+        print_results(name, rows)
+
+    print_runs(bench_runs())
+
+    print('import')
+
+    for module, best, loaded in bench_import():
+
+        print('{0:>12s}: {1:8.1f} ms  {2}'.format(module, 1e3 * best, loaded))
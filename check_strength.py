@@ -1,6 +1,3 @@
-import numpy as np
-
-
 def check_strength(step, colonies):
     '''
     Describe:
@@ -15,15 +12,9 @@ def check_strength(step, colonies):
     Return:
     None
     '''
-    # Calculate strength for each bacteria
+    # Calculate strength for each bacteria (cached in each colony until it changes)
     for i in colonies.keys():
 
-        ages = step - colonies[i].birth_date
-
-        colonies[i].ages = ages
-
-        strength = (10 / colonies[i].ages) + np.sqrt(len(colonies)) + (10 / (step - colonies[i].steps_eat))
-
-        colonies[i].strengths = strength
+        colonies[i].strength_check(step, colonies)
 
-    return 
\ No newline at end of file
+    return 
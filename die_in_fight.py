@@ -1,27 +1,22 @@
 import numpy as np
 
 
-def die_fight(colony, victim):
+def die_fight(colony, victims):
     '''
     Describe:
-    calculate the fight results.
+    calculate the fight results: remove all the victims of the colony with one compaction.
 
 
     Positional arguments:
-    -> vcivtim:                     victim of fight
+    -> victims:                     indices of the victims of fight in the colony
     -> colony:                      colony of bacteria
     
     Return:
     -> colony
     '''
     # Delete the dead bacteria information
-    colony.points = np.delete(colony.points, victim, 0)
-    colony.actions = np.delete(colony.actions, victim, 0)
-    colony.death_rate = np.delete(colony.death_rate, victim, 0)
-    colony.neighbours = np.delete(colony.neighbours, victim, 0)
-    colony.regions = np.delete(colony.regions, victim, 0)
-    colony.steps_eat = np.delete(colony.steps_eat, victim, 0)
-    colony.strengths = np.delete(colony.steps_eat, victim ,0)
-    colony.birth_date = np.delete(colony.birth_date, victim, 0)
+    survivors = np.ones(len(colony.points), dtype=bool)
+    survivors[np.asarray(victims, dtype=np.intp)] = False
+    colony.population.compact(survivors)
 
     return colony
\ No newline at end of file
@@ -2,16 +2,14 @@ import numpy as np
 from overlap_checking import *
 from check_strength import check_strength
 from die_in_fight import die_fight
-from collections import Counter
-import collections
-from itertools import combinations
 
 
-def fight(step, colonies, comb, inner_step):
+def fight(step, colonies, comb, inner_step, rng):
     '''
     Describe:
     Bacteria from each colony involved in the fight will be picked out and fight. The survivor will be based on the strengths of each
-    bacteria in the fight.
+    bacteria in the fight. A bacteria fights at most once in a round, all duels are settled at the same time and the dead bacteria of
+    each colony are removed in one go.
 
 
     Positional arguments:
@@ -19,6 +17,7 @@ def fight(step, colonies, comb, inner_step):
     -> colonies:            colony dictionary
     -> comb:                combinations of colonies involved in the fight
     -> inner_step:          pseudo evolution step
+    -> rng:                 random Generator
 
 
     Return:
@@ -28,115 +27,54 @@ def fight(step, colonies, comb, inner_step):
     # Get strength of each bacteria
     check_strength(step, colonies)
 
-    # Indexes of bacteria in each colony
-    colonies_index = dict()
+    comb = [pair for pair in comb if pair[0] in colonies and pair[1] in colonies]
 
-    # Colony required to fight
-    colonies_fight = list(set(np.asarray(comb).flatten()))
+    if len(comb) == 0:
 
-    
+        return inner_step
 
-    # Generate indexes of each colony that need to fight
-    for index in colonies_fight:
-
-        colonies_index[index] = [i for i in np.arange(len(colonies[index].points))]
-
-
-    # Choose all fighters with the same probability
-    check = True
-
-    while(check):
-
-        # Bacteria chosen from each colony
-        colony_bacteria = list()
-
-        # fighters
-        fighters = list()
-
-        #loop through fighting process
-        for pair in comb:
-            
-            # colony list with bacteria indexes
-            colony_0 = colonies_index[pair[0]]
-            colony_1 = colonies_index[pair[1]]
-
-            # randomly choose two bacteria in the fight
-            bacteria_0_index = np.random.choice(colony_0, 1)[0]
-            bacteria_1_index = np.random.choice(colony_1, 1)[0]
-
-            # positions for two bacteria
-            bacteria_0_position = colonies[pair[0]].points[bacteria_0_index]
-            bacteria_1_position = colonies[pair[1]].points[bacteria_1_index]
-
-            # strengths for two bacteria
-            strength_0 = float(colonies[pair[0]].strengths[bacteria_0_index])
-            strength_1 = float(colonies[pair[1]].strengths[bacteria_1_index])
-
-            # probability to survive for two bacteria
-            p_bacteria_0 = strength_0 / (strength_0 + strength_1)
-            p_bacteria_1 = 1 - p_bacteria_0
+    # Colony required to fight and the position of each of its fights
+    colonies_fight = list(dict.fromkeys(np.asarray(comb).flatten().tolist()))
+    sides = np.asarray(comb).reshape(-1)                        # colony on each side (2 x n_pairs)
+    fighters = np.full(len(sides), -1)                          # chosen bacteria on each side (-1: none left)
 
-            # Append two bacteria positions and their survival probability
-            fighters.append([
-                np.array([bacteria_0_index, p_bacteria_0]),
-                np.array([bacteria_1_index, p_bacteria_1])
-            ])
-
-            # Add posiitons
-            colony_bacteria.append(bacteria_0_position)
-            colony_bacteria.append(bacteria_1_position)
-            
-        
-        counter = 0
-
-        # Check if one baceria was chosen two times
-        comb_fighters = list(combinations(list(range(len(colony_bacteria))), 2))
-
-        for cb in comb_fighters:
-
-            if np.array_equal(colony_bacteria[cb[0]], colony_bacteria[cb[1]]):
-
-                break
-
-            else:
-
-                counter += 1
-        
-
-        if counter == len(comb_fighters):
-
-            check = False
+    # Choose distinct fighters in each colony with the same probability (without replacement).
+    # A colony with fewer bacteria than fights only attends as many fights as it has bacteria.
+    for index in colonies_fight:
 
-        else:
+        slots = np.flatnonzero(sides == index)
+        n_chosen = min(len(slots), len(colonies[index].points))
+        fighters[slots[:n_chosen]] = rng.choice(len(colonies[index].points), n_chosen, replace=False)
 
-            pass
-                
+    fighters = fighters.reshape(-1, 2)
+    sides = sides.reshape(-1, 2)
 
-    # Fight
-    for i in range(len(fighters)):
+    # Only pairs with a fighter on both sides fight
+    fighting = np.all(fighters >= 0, axis=1)
+    fighters = fighters[fighting]
+    sides = sides[fighting]
 
-        survivor = int(np.random.choice([fighters[i][0][0], fighters[i][1][0]], 
-                                         p=[fighters[i][0][1], fighters[i][1][1]]))
+    # strengths of the fighters
+    strength_0 = np.array([colonies[c].strengths[b] for c, b in zip(sides[:, 0], fighters[:, 0])], dtype=float)
+    strength_1 = np.array([colonies[c].strengths[b] for c, b in zip(sides[:, 1], fighters[:, 1])], dtype=float)
 
-        # Pop the chosen bacteria index 
-        if survivor == fighters[i][0][0]:
+    # Fight: one Bernoulli draw for all duels. The probability to survive is based on the strengths.
+    p_bacteria_0 = strength_0 / (strength_0 + strength_1)
+    survivor_0 = rng.random(len(fighters)) < p_bacteria_0
 
-            colony = die_fight(colonies[comb[i][1]], fighters[i][1][0])
+    # Victims of each colony
+    victim_colony = np.where(survivor_0, sides[:, 1], sides[:, 0])
+    victim = np.where(survivor_0, fighters[:, 1], fighters[:, 0])
 
-            if len(colony.points) == 0:
+    # Remove all victims of a colony at once
+    for index in colonies_fight:
 
-                del colonies[comb[i][1]]
-        
-        else:
+        die_fight(colonies[index], victim[victim_colony == index])
 
-            colony = die_fight(colonies[comb[i][0]], fighters[i][0][0])
+        if len(colonies[index].points) == 0:
 
-            if len(colony.points) == 0:
+            del colonies[index]
 
-                del colonies[comb[i][0]]
-        
-        inner_step += 1
-    
+    inner_step += len(fighters)
 
     return inner_step
-
@@ -1,6 +1,8 @@
 import numpy as np
+from scipy.spatial import cKDTree
+from kernels import select, choose_food
 
-def drop_food(n_food, x_low, x_high, y_low, y_high):
+def drop_food(n_food, x_low, x_high, y_low, y_high, rng):
     '''
     Describe:
     Randomly drop food on the surface.
@@ -12,6 +14,7 @@ def drop_food(n_food, x_low, x_high, y_low, y_high):
     -> x_high: end point of the playground along the x-axis
     -> y_low: start point of the playground along the y-axis
     -> y_high: end point of the playground along the y-axis
+    -> rng: random Generator
 
 
     Return:
@@ -19,8 +22,182 @@ def drop_food(n_food, x_low, x_high, y_low, y_high):
     '''
 
     # Set the position of the food
-    x_positions = np.random.uniform(x_low, x_high, (n_food, 1)) 
-    y_positions = np.random.uniform(y_low, y_high, (n_food, 1))
+    x_positions = rng.uniform(x_low, x_high, (n_food, 1))
+    y_positions = rng.uniform(y_low, y_high, (n_food, 1))
     positions = np.hstack([x_positions, y_positions])
 
-    return positions
\ No newline at end of file
+    return positions
+
+
+class Food():
+    '''
+    Description:
+    Food pieces on the surface indexed by a KD-tree. Eaten pieces are only marked as dead (tombstones) instead of being
+    removed from the array, and the tree is rebuilt from the living pieces once more than half of the indexed food is gone.
+
+
+    Attributes:
+    -> positions:                               Coordinates of the food pieces indexed by the tree.
+    -> alive:                                   Boolean mask of the food pieces which have not been eaten yet.
+    -> tree:                                    cKDTree built on positions (None if there is no food).
+    -> backend:                                 backend of the kernels: 'numpy' or 'numba' (see kernels.py)
+
+
+    Buit-in methods:
+    --- eat:                                    bacteria at the given positions eat the food in their eat distance
+    --- remaining:                              positions of the food which has not been eaten
+    '''
+
+
+    def __init__(self, positions, backend='numpy'):
+        '''
+        Describe:
+        Build the food store from the positions given by drop_food.
+
+
+        Positional arguments:
+        -> self:
+        -> positions:           a n_food x 2 array with positions of the food
+
+
+        Keyward arguments:
+        -> backend:             backend of the kernels: 'numpy' or 'numba' (see kernels.py)
+
+
+        Return:
+        None
+        '''
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.alive = np.ones(len(self.positions), dtype=bool)
+        self.n_alive = len(self.positions)
+        self.tree = cKDTree(self.positions) if self.n_alive > 0 else None
+        self.backend = backend
+
+        return
+
+
+    def __len__(self):
+
+        return self.n_alive
+
+
+    @property
+    def remaining(self):
+        '''
+        Positions of the food which has not been eaten yet.
+        '''
+
+        return self.positions[self.alive]
+
+
+    def rebuild(self):
+        '''
+        Describe:
+        Drop the eaten food from the store and rebuild the KD-tree on the living food.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Return:
+        None
+        '''
+        self.positions = self.positions[self.alive]
+        self.alive = np.ones(len(self.positions), dtype=bool)
+        self.tree = cKDTree(self.positions) if self.n_alive > 0 else None
+
+        return
+
+
+    def eat(self, bacteria_positions, eat_distance, rng):
+        '''
+        Describe:
+        All the given bacteria eat at once. Each bacteria chooses one piece of food at random in its eat distance. If several
+        bacteria choose the same piece, the one with the lowest index gets it and the others choose again from the food left,
+        until no hungry bacteria can reach any food. The eaten food is marked as dead.
+
+
+        Positional arguments:
+        -> self:
+        -> bacteria_positions:  a n_bacteria x 2 array with positions of the bacteria
+        -> eat_distance:        the prey region of the bacteria (radius)
+        -> rng:                 random Generator for the choice of the food
+
+
+        Return:
+        -> ate:                 a boolean array (n_bacteria) which is True for the bacteria that ate food
+        '''
+        bacteria_positions = np.asarray(bacteria_positions, dtype=float).reshape(-1, 2)
+        ate = np.zeros(len(bacteria_positions), dtype=bool)
+
+        # No food or no bacteria
+        if self.n_alive == 0 or len(bacteria_positions) == 0:
+
+            return ate
+
+        # All (food, bacteria) pairs in the eat distance
+        pairs = self.tree.sparse_distance_matrix(cKDTree(bacteria_positions), eat_distance, output_type='ndarray')
+        food_index = pairs['i'].astype(np.intp)
+        bacteria_index = pairs['j'].astype(np.intp)
+
+        while len(food_index) != 0:
+
+            # Only living food and hungry bacteria stay in the menu
+            keep = self.alive[food_index] & ~ate[bacteria_index]
+            food_index = food_index[keep]
+            bacteria_index = bacteria_index[keep]
+
+            if len(food_index) == 0:
+
+                break
+
+            # Each bacteria randomly chooses one piece of food from its menu; the bacteria with the lowest index wins a piece
+            kernel = select(choose_food, self.backend)
+            food_eaten, eaters = kernel(food_index, bacteria_index, rng.random(len(food_index)), len(ate), len(self.positions))
+            ate[eaters] = True
+            self.alive[food_eaten] = False
+            self.n_alive -= len(food_eaten)
+
+        # Rebuild the tree once most of the indexed food has been eaten
+        if self.n_alive < len(self.positions) // 2:
+
+            self.rebuild()
+
+        return ate
+
+
+def feed(colonies, food, step, eat_distance, rng):
+    '''
+    Describe:
+    Bacteria of all the colonies eat the food around them in one batched pass. Colonies earlier in the dictionary have the
+    priority when bacteria from different colonies choose the same piece of food.
+
+
+    Positional arguments:
+    -> colonies:            colony dictionary
+    -> food:                Food store
+    -> step:                current step
+    -> eat_distance:        the prey region of the bacteria (radius)
+    -> rng:                 random Generator for the choice of the food
+
+
+    Return:
+    None
+    '''
+    keys = list(colonies.keys())
+
+    if len(keys) == 0:
+
+        return
+
+    sizes = [len(colonies[key].points) for key in keys]
+    ate = food.eat(np.vstack([colonies[key].points for key in keys]), eat_distance, rng)
+
+    # Record the step when the bacteria eat the food
+    for key, ate_colony in zip(keys, np.split(ate, np.cumsum(sizes)[:-1])):
+
+        colonies[key].steps_eat[ate_colony] = step
+        colonies[key].population.touch()
+
+    return
@@ -0,0 +1,143 @@
+import os
+import pickle
+import sqlite3
+
+
+class Journal():
+    '''
+    Description:
+    Durable record of the finished simulations of a sweep, stored in a SQLite file. Every result is committed as soon as it is
+    recorded, so a sweep that crashes can be restarted and skip the (strip, replicate) tasks that are already done.
+
+
+    Attributes:
+    -> path:                                    path of the SQLite file
+    -> connection:                              connection to the SQLite file
+
+
+    Buit-in methods:
+    --- done:                                   results already recorded
+    --- record:                                 record the result of one simulation
+    --- close:                                  close the journal
+    '''
+
+
+    def __init__(self, path):
+
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                                'strip INTEGER NOT NULL, replicate INTEGER NOT NULL, step, stop_reason TEXT, '
+                                'PRIMARY KEY (strip, replicate))')
+
+        # Journals written before the stop reasons were recorded
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(results)')]
+
+        if 'stop_reason' not in columns:
+
+            self.connection.execute('ALTER TABLE results ADD COLUMN stop_reason TEXT')
+
+        self.connection.commit()
+
+        return
+
+
+    def done(self):
+        '''
+        Describe:
+        Get the results which are already recorded.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Return:
+        -> dictionary: (strip, replicate) -> (half life, stop reason)
+        '''
+        rows = self.connection.execute('SELECT strip, replicate, step, stop_reason FROM results')
+
+        return {(strip, replicate): (step, stop_reason) for strip, replicate, step, stop_reason in rows}
+
+
+    def record(self, strip, replicate, step, stop_reason=None):
+        '''
+        Describe:
+        Record the result of one simulation and commit it to the disk.
+
+
+        Positional arguments:
+        -> self:
+        -> strip:               index of the N, d and d2 combination
+        -> replicate:           index of the replicate
+        -> step:                half life of the simulation (int, 'N/A' or None)
+
+
+        Keyward arguments:
+        -> stop_reason:         why the simulation stopped (see simulation.STOP_REASONS)
+
+
+        Return:
+        None
+        '''
+        if step is not None and not isinstance(step, str):
+
+            step = int(step)
+
+        self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', (int(strip), int(replicate), step, stop_reason))
+        self.connection.commit()
+
+        return
+
+
+    def close(self):
+
+        self.connection.close()
+
+        return
+
+
+def save_checkpoint(path, state):
+    '''
+    Describe:
+    Save the state of a simulation. The state is written to a temporary file first and then moved to the path, so a crash while
+    writing never leaves a broken checkpoint.
+
+
+    Positional arguments:
+    -> path:                path of the checkpoint
+    -> state:               picklable state of the simulation
+
+
+    Return:
+    None
+    '''
+    temporary = path + '.tmp'
+
+    with open(temporary, 'wb') as file:
+
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary, path)
+
+    return
+
+
+def load_checkpoint(path):
+    '''
+    Describe:
+    Load the state of a simulation saved by save_checkpoint.
+
+
+    Positional arguments:
+    -> path:                path of the checkpoint
+
+
+    Return:
+    -> state of the simulation
+    '''
+    with open(path, 'rb') as file:
+
+        return pickle.load(file)
@@ -0,0 +1,148 @@
+import numpy as np
+
+# Backends of the kernels: 'numpy' (reference) and 'numba' (kernels_numba.py, compiled with Numba)
+BACKENDS = ('numpy', 'numba')
+
+
+def select(function, backend='numpy'):
+    '''
+    Describe:
+    The kernel of a backend. Every kernel of kernels_numba.py has the name and the arguments of its NumPy reference, so the
+    NumPy kernel is given and the kernel of the same name in the backend is returned. Numba is only imported when its backend
+    is used.
+
+
+    Positional arguments:
+    -> function:            NumPy kernel
+
+
+    Keyward arguments:
+    -> backend:             one of BACKENDS
+
+
+    Return:
+    -> kernel of the backend
+    '''
+    if backend == 'numpy':
+
+        return function
+
+    if backend == 'numba':
+
+        import kernels_numba
+
+        return getattr(kernels_numba, function.__name__)
+
+    raise ValueError('unknown backend {0!r}: expected one of {1}'.format(backend, BACKENDS))
+
+
+def vital_rates(step, birth_date, steps_eat, neighbours, n_colonies, k_die_0):
+    '''
+    Describe:
+    Age, strength and death rate of each bacteria in one pass over the population.
+
+        age         = step - birth_date
+        strength    = 10 / age + sqrt(number of colonies) + 10 / (step - steps_eat)
+        death rate  = k_die_0 / neighbours if the bacteria has not eaten in the last 10 steps (or never), otherwise 0
+
+    A bacteria born in this step has age 0 and one which ate in this step has 0 steps since its meal. Both are counted as 1
+    step, so the strength stays finite (10 / 0 gave Inf, and two Inf strengths gave NaN in the fights).
+
+
+    Positional arguments:
+    -> step:                current step
+    -> birth_date:          step when each bacteria was born
+    -> steps_eat:           step of the last meal of each bacteria (Inf if never eaten)
+    -> neighbours:          number of neighbours of each bacteria
+    -> n_colonies:          number of colonies
+    -> k_die_0:             death rate when there are no neighbours
+
+
+    Return:
+    -> ages:                int32 array
+    -> strengths:           float32 array
+    -> death_rate:          float32 array
+    '''
+    ages = np.subtract(step, birth_date, dtype=np.int32)
+
+    # Steps since the last meal (-Inf if never eaten: 10 / -Inf adds nothing to the strength)
+    since_eat = np.subtract(np.float32(step), steps_eat, dtype=np.float32)
+    hungry = np.isinf(since_eat) | (since_eat > 10)
+
+    # strength = 10 / age + sqrt(n_colonies) + 10 / since_eat (0 counted as 1), with one buffer for the result
+    strengths = np.maximum(ages, 1, dtype=np.float32)
+    np.divide(np.float32(10), strengths, out=strengths)
+    strengths += np.float32(np.sqrt(n_colonies))
+    since_eat[since_eat == 0] = 1
+    np.divide(np.float32(10), since_eat, out=since_eat)
+    strengths += since_eat
+
+    # death rate = k_die_0 / neighbours for the hungry bacteria (Inf without neighbours: the bacteria dies for sure)
+    death_rate = np.zeros(len(ages), dtype=np.float32)
+
+    with np.errstate(divide='ignore'):
+
+        np.divide(np.float32(k_die_0), neighbours, out=death_rate, where=hungry, casting='unsafe')
+
+    return ages, strengths, death_rate
+
+
+def choose_actions(death_rate, k_duplicate, k_move, u):
+    '''
+    Describe:
+    Action of each bacteria from one uniform draw compared with the cumulative probabilities of the actions.
+    1: die; 2: duplicate; 3: move (an Inf death rate always gives 1)
+
+
+    Positional arguments:
+    -> death_rate:          death rate of each bacteria
+    -> k_duplicate:         duplicate rate
+    -> k_move:              move rate
+    -> u:                   uniform draw in [0, 1) for each bacteria
+
+
+    Return:
+    -> actions:             int8 array
+    '''
+    # An Inf death rate is a certain death: it is left out of the probabilities (Inf / Inf would be NaN)
+    certain = np.isinf(death_rate)
+    death_rate = np.where(certain, death_rate.dtype.type(0), death_rate)
+    sum_p = k_duplicate + k_move + death_rate
+
+    # Cumulative probability for each action (die, die + duplicate)
+    die_p = death_rate / sum_p
+    duplicate_p = die_p + k_duplicate / sum_p
+
+    return np.where(certain, 1, 1 + (u >= die_p) + (u >= duplicate_p)).astype(np.int8)
+
+
+def choose_food(food_index, bacteria_index, r, n_bacteria, n_food):
+    '''
+    Describe:
+    One round of the meals (see food.Food.eat): each bacteria chooses the piece of food of its menu with the lowest random
+    number, and a piece chosen by several bacteria goes to the one with the lowest index.
+
+
+    Positional arguments:
+    -> food_index:          food of each (food, bacteria) pair of the menus
+    -> bacteria_index:      bacteria of each pair
+    -> r:                   uniform draw for each pair
+    -> n_bacteria:          number of bacteria
+    -> n_food:              number of pieces of food
+
+
+    Return:
+    -> food_eaten:          pieces of food eaten in this round (sorted)
+    -> eaters:              bacteria which ate them
+    '''
+    order = np.lexsort((r, bacteria_index))
+    sorted_bacteria = bacteria_index[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_bacteria[1:] != sorted_bacteria[:-1]
+    chosen_bacteria = sorted_bacteria[first]
+    chosen_food = food_index[order][first]
+
+    # The bacteria with the lowest index wins the piece of food
+    food_eaten, winner = np.unique(chosen_food, return_index=True)
+
+    return food_eaten, chosen_bacteria[winner]
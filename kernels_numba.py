@@ -0,0 +1,164 @@
+import functools
+import threading
+import numpy as np
+from numba import njit, prange
+from strip import COATED
+
+# Compiled kernels (Numba) with the names and the arguments of their NumPy references (see kernels.select). Each one is a
+# single loop over the bacteria without temporary arrays. The random draws are made by the caller with the random Generator
+# of the colony, so both backends consume the same random streams. Compiled code is cached on the disk after the first run.
+# error_model='numpy': a division by zero gives Inf (or NaN) as in NumPy instead of raising.
+
+# Every kernel has two compiled versions. The main thread runs the parallel one on all cores. The threads of the per-colony
+# pool (Config.threads) already use the cores, so they run the serial one, which releases the GIL: the default threading
+# layer of Numba (workqueue) aborts when parallel kernels are launched from several threads at the same time, and no lock
+# is needed this way.
+
+
+def jit(function):
+    '''
+    Describe:
+    Compile a kernel for all cores, and for one core in the threads of the per-colony pool.
+
+
+    Positional arguments:
+    -> function:            kernel written in the subset of Python and NumPy supported by Numba
+
+
+    Return:
+    -> kernel:              compiled kernel (kernel.parallel and kernel.serial are the two compiled versions)
+    '''
+    parallel = njit(parallel=True, cache=True, error_model='numpy')(function)
+
+    # Not cached: the cache of Numba does not tell the two versions of a function apart. Compiled at the first call from a
+    # thread of the pool.
+    serial = njit(nogil=True, error_model='numpy')(function)
+
+    @functools.wraps(function)
+    def kernel(*args):
+
+        if threading.current_thread() is threading.main_thread():
+
+            return parallel(*args)
+
+        return serial(*args)
+
+    kernel.parallel = parallel
+    kernel.serial = serial
+
+    return kernel
+
+
+@jit
+def vital_rates(step, birth_date, steps_eat, neighbours, n_colonies, k_die_0):
+    '''
+    Describe:
+    Age, strength and death rate of each bacteria (see kernels.vital_rates).
+    '''
+    n = len(birth_date)
+    ages = np.empty(n, dtype=np.int32)
+    strengths = np.empty(n, dtype=np.float32)
+    death_rate = np.zeros(n, dtype=np.float32)
+    root = np.float32(np.sqrt(n_colonies))
+
+    for i in prange(n):
+
+        age = np.int32(step - birth_date[i])
+        since_eat = np.float32(step) - steps_eat[i]
+        hungry = np.isinf(since_eat) or since_eat > 10
+
+        # Age 0 and 0 steps since the last meal count as 1
+        ages[i] = age
+        strengths[i] = np.float32(10) / np.float32(max(age, 1)) + root
+        strengths[i] += np.float32(10) / (since_eat if since_eat != 0 else np.float32(1))
+
+        if hungry:
+
+            death_rate[i] = np.float32(k_die_0) / np.float32(neighbours[i])
+
+    return ages, strengths, death_rate
+
+
+@jit
+def choose_actions(death_rate, k_duplicate, k_move, u):
+    '''
+    Describe:
+    Action of each bacteria from one uniform draw (see kernels.choose_actions).
+    '''
+    actions = np.empty(len(death_rate), dtype=np.int8)
+    k = np.float32(k_duplicate + k_move)
+
+    for i in prange(len(death_rate)):
+
+        # An Inf death rate is a certain death
+        if np.isinf(death_rate[i]):
+
+            actions[i] = 1
+
+        else:
+
+            sum_p = k + death_rate[i]
+            die_p = death_rate[i] / sum_p
+            duplicate_p = die_p + np.float32(k_duplicate) / sum_p
+            actions[i] = 1 + (u[i] >= die_p) + (u[i] >= duplicate_p)
+
+    return actions
+
+
+@jit
+def displace(points, regions, index, magnitude, angle, vertices_y, x_low, x_high, y_low, y_high):
+    '''
+    Describe:
+    Displace some bacteria and reject the movements that are not allowed (see movement.displace).
+    '''
+    n_moved = 0
+
+    for j in prange(len(index)):
+
+        i = index[j]
+        # Checked as stored in the population (float32)
+        x = np.float32(points[i, 0] + magnitude[j] * np.cos(angle[j]))
+        y = np.float32(points[i, 1] + magnitude[j] * np.sin(angle[j]))
+        region = np.searchsorted(vertices_y, y)
+        jump = abs(region - regions[i])
+
+        # Not more than one region, not out of the coated region and not out of the playground
+        if jump <= 1 and not (COATED[region] and jump >= 1) and x_low <= x <= x_high and y_low <= y <= y_high:
+
+            points[i, 0] = x
+            points[i, 1] = y
+            regions[i] = region
+            n_moved += 1
+
+    return n_moved
+
+
+@jit
+def choose_food(food_index, bacteria_index, r, n_bacteria, n_food):
+    '''
+    Describe:
+    One round of the meals (see kernels.choose_food). Two passes over the pairs and the bacteria instead of a sort.
+    '''
+    # Pair with the lowest random number of each bacteria (the first one on a tie, as the stable sort)
+    best = np.full(n_bacteria, -1, dtype=np.int64)
+
+    for k in range(len(food_index)):
+
+        b = bacteria_index[k]
+
+        if best[b] == -1 or r[k] < r[best[b]]:
+
+            best[b] = k
+
+    # Bacteria with the lowest index which chose each piece of food
+    winner = np.full(n_food, n_bacteria, dtype=np.int64)
+
+    for b in range(n_bacteria):
+
+        if best[b] != -1 and b < winner[food_index[best[b]]]:
+
+            winner[food_index[best[b]]] = b
+
+    food_eaten = np.flatnonzero(winner < n_bacteria)
+
+    return food_eaten, winner[food_eaten]
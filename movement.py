@@ -0,0 +1,219 @@
+import numpy as np
+import math
+from strip import region_check, COATED
+from kernels import select
+from population import FIELDS
+
+# dtype of the positions in the population: positions are checked in this dtype, as they are stored
+POINTS_DTYPE = FIELDS['points'][0]
+
+
+def legal_positions(new_positions, old_regions, vertices_y, x_low, x_high, y_low, y_high):
+    '''
+    Describe:
+    Check if bacteria are allowed to go to the new positions based on the following principle:
+    Bacteria cannot move more than one region or move out of the coated region.
+    Bacteria cannot move out of the playground.
+
+
+    Positional arguments:
+    -> new_positions:       a n x 2 array of the new positions
+    -> old_regions:         regions of the bacteria before moving
+    -> vertices_y:          y coordinates of the strip vertices
+    -> x_low:               lowest limit of x-dimension of the playground
+    -> x_high:              highest limit of x-dimension of the playground
+    -> y_low:               lowest limit of y-dimension of the playground
+    -> y_high:              highest limit of y-dimension of the playground
+
+
+    Return:
+    -> legal:               boolean array (n) which is True if the new position is allowed
+    -> new_regions:         regions of the new positions
+    '''
+    new_regions = region_check(new_positions[:, 1], vertices_y)
+
+    # Check the movement between strips
+    displacement = np.abs(new_regions.astype(np.int16) - old_regions)
+
+    # If the bacteria move more than one regions or it is in the coated region but moved out, return False. (Based on y coordinates)
+    legal = ~np.logical_or(displacement > 1, np.logical_and(COATED[new_regions], displacement >= 1))
+
+    # If the bacteria move out of the playground, return False
+    legal &= (new_positions[:, 0] >= x_low) & (new_positions[:, 0] <= x_high)
+    legal &= (new_positions[:, 1] >= y_low) & (new_positions[:, 1] <= y_high)
+
+    return legal, new_regions
+
+
+def place_offspring(parents, parent_regions, born_radius, vertices_y, x_low, x_high, y_low, y_high, rng, max_retry=100):
+    '''
+    Describe:
+    Place the duplicated bacteria at random positions in a circle around their parents. Only the offspring at positions that
+    are not allowed are drawn again. After max_retry draws the offspring still rejected are clamped into the strip and the
+    playground of their parents. The positions are drawn and checked in the dtype of the population, so an offspring
+    stays in the region it was checked in once it is stored.
+
+
+    Positional arguments:
+    -> parents:             a n x 2 array of the parent positions
+    -> parent_regions:      regions of the parents
+    -> born_radius:         distance in which duplicated bacteria are
+    -> vertices_y:          y coordinates of the strip vertices
+    -> x_low:               lowest limit of x-dimension of the playground
+    -> x_high:              highest limit of x-dimension of the playground
+    -> y_low:               lowest limit of y-dimension of the playground
+    -> y_high:              highest limit of y-dimension of the playground
+    -> rng:                 random Generator
+
+
+    Keyward arguments:
+    -> max_retry:           maximum number of draws for each offspring
+
+
+    Return:
+    -> positions:           a n x 2 array of the offspring positions
+    -> regions:             regions of the offspring
+    '''
+    n = len(parents)
+    positions = np.empty((n, 2), dtype=POINTS_DTYPE)
+    regions = np.empty(n, dtype=np.int8)
+    rejected = np.arange(n)
+
+    for _ in range(max_retry):
+
+        if len(rejected) == 0:
+
+            break
+
+        # Positions of duplicated points in polar form
+        angle = 2*math.pi * rng.random(len(rejected))
+        r = born_radius * rng.random(len(rejected))
+        positions[rejected] = parents[rejected] + np.column_stack([r * np.cos(angle), r * np.sin(angle)])
+
+        legal, regions[rejected] = legal_positions(positions[rejected], parent_regions[rejected], vertices_y,
+                                                   x_low, x_high, y_low, y_high)
+        rejected = rejected[~legal]
+
+    # Clamp the rest into the strip of the parent and the playground
+    if len(rejected) != 0:
+
+        strip_low, strip_high = strip_limits(parent_regions[rejected], vertices_y, y_low, y_high)
+
+        positions[rejected, 0] = np.clip(positions[rejected, 0], x_low, x_high)
+        positions[rejected, 1] = np.clip(positions[rejected, 1], strip_low, strip_high)
+        regions[rejected] = parent_regions[rejected]
+
+    return positions, regions
+
+
+def strip_limits(regions, vertices_y, y_low, y_high):
+    '''
+    Describe:
+    Lowest and highest y coordinates, in the dtype of the population, that are in the given regions and in the playground.
+    The bounds are rounded inwards: the lower vertex of a strip belongs to the strip below (region_check searches with
+    side='left'), so the lowest coordinate is the next float above it.
+
+
+    Positional arguments:
+    -> regions:             regions
+    -> vertices_y:          y coordinates of the strip vertices
+    -> y_low:               lowest limit of y-dimension of the playground
+    -> y_high:              highest limit of y-dimension of the playground
+
+
+    Return:
+    -> low:                 lowest y coordinate of each region (POINTS_DTYPE)
+    -> high:                highest y coordinate of each region (POINTS_DTYPE)
+    '''
+    bounds = np.concatenate([[-np.inf], vertices_y, [np.inf]])
+    exact_low = np.maximum(bounds[regions], y_low)
+    exact_high = np.minimum(bounds[regions + 1], y_high)
+    low = exact_low.astype(POINTS_DTYPE)
+    high = exact_high.astype(POINTS_DTYPE)
+
+    # Below the exact bound, or on the vertex of the strip below
+    up = (low < exact_low) | ((low == exact_low) & (bounds[regions] >= y_low))
+    low[up] = np.nextafter(low[up], POINTS_DTYPE(np.inf))
+
+    down = high > exact_high
+    high[down] = np.nextafter(high[down], POINTS_DTYPE(-np.inf))
+
+    return low, high
+
+
+def move(points, regions, moving, mu, std, vertices_y, x_low, x_high, y_low, y_high, rng, backend='numpy'):
+    '''
+    Describe:
+    Move the bacteria which are required to move. Each moving bacteria draws its own displacement: a magnitude from the Gaussian
+    distribution and a uniform direction. Movements that are not allowed are rejected and those bacteria stay where they are.
+    Positions and regions are updated in place.
+
+
+    Positional arguments:
+    -> points:              a n x 2 array of the bacteria positions (updated in place)
+    -> regions:             regions of the bacteria (updated in place)
+    -> moving:              boolean array (n) which is True for the bacteria that move
+    -> mu:                  the mean of the Gaussian distribution
+    -> std:                 the standard deviation of the Gaussian distribution
+    -> vertices_y:          y coordinates of the strip vertices
+    -> x_low:               lowest limit of x-dimension of the playground
+    -> x_high:              highest limit of x-dimension of the playground
+    -> y_low:               lowest limit of y-dimension of the playground
+    -> y_high:              highest limit of y-dimension of the playground
+    -> rng:                 random Generator
+
+
+    Keyward arguments:
+    -> backend:             backend of the kernel (see kernels.py)
+
+
+    Return:
+    -> n_moved:             number of the bacteria that moved
+    '''
+    index = np.flatnonzero(moving)
+
+    if len(index) == 0:
+
+        return 0
+
+    # One (magnitude, angle) pair for each moving bacteria
+    magnitude = rng.normal(mu, std, len(index))
+    angle = 2*math.pi * rng.random(len(index))
+
+    return select(displace, backend)(points, regions, index, magnitude, angle, vertices_y, x_low, x_high, y_low, y_high)
+
+
+def displace(points, regions, index, magnitude, angle, vertices_y, x_low, x_high, y_low, y_high):
+    '''
+    Describe:
+    Displace some bacteria by the given magnitudes and angles. Movements that are not allowed are rejected. Positions and
+    regions are updated in place.
+
+
+    Positional arguments:
+    -> points:              a n x 2 array of the bacteria positions (updated in place)
+    -> regions:             regions of the bacteria (updated in place)
+    -> index:               indices of the bacteria that move
+    -> magnitude:           length of the displacement of each moving bacteria
+    -> angle:               direction of the displacement of each moving bacteria
+    -> vertices_y:          y coordinates of the strip vertices
+    -> x_low:               lowest limit of x-dimension of the playground
+    -> x_high:              highest limit of x-dimension of the playground
+    -> y_low:               lowest limit of y-dimension of the playground
+    -> y_high:              highest limit of y-dimension of the playground
+
+
+    Return:
+    -> n_moved:             number of the bacteria that moved
+    '''
+    # The new positions are checked as they will be stored
+    new_positions = points[index] + magnitude[:, None] * np.column_stack([np.cos(angle), np.sin(angle)])
+    new_positions = new_positions.astype(points.dtype)
+
+    # Reject unallowed movement and keep the rest
+    legal, new_regions = legal_positions(new_positions, regions[index], vertices_y, x_low, x_high, y_low, y_high)
+    moved = index[legal]
+    points[moved] = new_positions[legal]
+    regions[moved] = new_regions[legal]
+
+    return len(moved)
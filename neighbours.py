@@ -0,0 +1,318 @@
+import numpy as np
+from scipy.spatial import Delaunay, QhullError
+
+# Largest share of the colony (dead bacteria and survivors around them) triangulated again by Neighbours.remove; above it the
+# colony is triangulated again as a whole at the next count
+REBUILD = 0.25
+
+
+class Neighbours():
+    '''
+    Description:
+    Neighbour counter of one colony based on the Delaunay triangulation. Two bacteria are neighbours if their Voronoi cells
+    share a ridge, which is the same as being joined by an edge of the Delaunay triangulation, so the number of neighbours of
+    a bacteria is the number of its Delaunay edges.
+
+    The triangulation and the counts are kept between calls, so the work follows the changes of the colony:
+    -> no change:                               the counts are returned again
+    -> new bacteria appended (duplication, merge): the new ones are added to the triangulation incrementally
+    -> bacteria removed (die):                  only the cavities left by the dead bacteria are triangulated again (remove)
+    -> bacteria moved:                          the triangulation is rebuilt
+
+
+    Attributes:
+    -> tri:                                     incremental Delaunay triangulation of the colony (None if not built)
+    -> n_points:                                number of bacteria in the triangulation
+    -> points:                                  positions of the bacteria of the last count (None if there is none)
+    -> counts:                                  number of Delaunay edges of each of these bacteria
+
+
+    Buit-in methods:
+    --- count:                                  count the neighbours of each bacteria
+    --- remove:                                 remove bacteria from the triangulation and update the counts
+    '''
+
+
+    def __init__(self):
+
+        self.tri = None
+        self.n_points = 0
+        self.points = None
+        self.counts = None
+
+        return
+
+
+    def __getstate__(self):
+
+        # The Qhull triangulation cannot be pickled: it is rebuilt at the next count
+        return {'tri': None, 'n_points': 0, 'points': None, 'counts': None}
+
+
+    def reset(self):
+
+        self.tri = None
+        self.n_points = 0
+        self.points = None
+        self.counts = None
+
+        return
+
+
+    def count(self, points):
+        '''
+        Describe:
+        Count the neighbours of each bacteria in the colony.
+
+
+        Positional arguments:
+        -> self:
+        -> points:          a n_bacteria x 2 array of bacteria positions
+
+
+        Return:
+        -> neighbours:      int array (n_bacteria) with the number of neighbours of each bacteria
+        '''
+        n = len(points)
+
+        # The bacteria have not changed since the last count (or the last remove)
+        if self.points is not None and np.array_equal(points, self.points):
+
+            return self.counts.copy()
+
+        # Fewer than 4 bacteria: a point, a segment or a triangle
+        if n <= 3:
+
+            self.reset()
+
+            return self._count_small(points)
+
+        try:
+
+            # Only new bacteria are appended: add them to the triangulation
+            if self.tri is not None and n >= self.n_points and np.array_equal(points[:self.n_points], self.tri.points):
+
+                if n > self.n_points:
+
+                    self.tri.add_points(points[self.n_points:])
+
+            else:
+
+                self.tri = Delaunay(points, incremental=True)
+
+        except QhullError:
+
+            self.reset()
+
+            if on_line(points):
+
+                return self._count_on_line(points)
+
+            # Nearly on one line: Qhull cannot decide the first simplex, the joggled input (QJ) always gives a triangulation
+            self.tri = Delaunay(points, incremental=True, qhull_options='QJ')
+
+        self.n_points = n
+
+        # Number of Delaunay edges of each bacteria. Bacteria on top of each other are not vertices of the triangulation
+        # (coplanar for Qhull): they share the number of neighbours of the closest vertex.
+        neighbours = np.diff(self.tri.vertex_neighbor_vertices[0]).astype(np.int32)
+        coplanar = self.tri.coplanar
+        neighbours[coplanar[:, 0]] = neighbours[coplanar[:, 2]]
+        self.points = points.copy()
+        self.counts = neighbours.copy()
+
+        return neighbours
+
+
+    def remove(self, keep):
+        '''
+        Describe:
+        Remove bacteria from the last count. The triangles which do not touch a removed bacteria stay in the triangulation of
+        the survivors, and the new triangles of each cavity left by the removed bacteria join the survivors around it, so only
+        the removed bacteria and these survivors are triangulated again. The edges of the new triangles which were not edges
+        before are added to the counts, and the next count of the survivors returns the counts without a new triangulation.
+
+
+        Positional arguments:
+        -> self:
+        -> keep:            boolean array (n_bacteria of the last count) which is True for the bacteria that stay
+
+
+        Return:
+        None
+        '''
+        if self.tri is None or self.points is None or len(keep) != len(self.points):
+
+            self.reset()
+
+            return
+
+        dead = np.flatnonzero(~keep)
+
+        if len(dead) == 0:
+
+            return
+
+        n = len(keep)
+        tri = self.tri
+        indptr, indices = tri.vertex_neighbor_vertices
+        degrees = np.diff(indptr)
+        coplanar = tri.coplanar[keep[tri.coplanar[:, 0]]]
+
+        # Too few survivors, or a surviving bacteria on top of a dead one would become a vertex: triangulate again at the next
+        # count
+        if n - len(dead) <= 3 or not keep[coplanar[:, 2]].all():
+
+            self.reset()
+
+            return
+
+        # The edges to the dead bacteria disappear (the dead bacteria which are not vertices have no edges)
+        dead = dead[degrees[dead] != 0]
+        around = indices[edge_positions(indptr, dead)]
+        counts = (degrees - np.bincount(around, minlength=n)).astype(np.int32)
+        ring = np.unique(around[keep[around]])
+
+        # Two local triangulations of many bacteria cost more than one of the whole colony
+        if len(ring) + len(dead) > REBUILD * n:
+
+            self.reset()
+
+            return
+
+        if len(ring) >= 3:
+
+            try:
+
+                cavity = Delaunay(self.points[ring])
+
+            except QhullError:
+
+                self.reset()
+
+                return
+
+            if len(cavity.coplanar) != 0:
+
+                self.reset()
+
+                return
+
+            # The cavities are the old triangles with a dead vertex, which are also the triangles with a dead vertex of the
+            # triangulation of the dead bacteria and the survivors around them. The new triangles are the triangles of the
+            # survivors around the cavities which are inside a cavity.
+            local = np.concatenate([ring, dead])
+            star = Delaunay(self.points[local])
+            triangles = ring[cavity.simplices]
+            inside = star.find_simplex(self.points[triangles].mean(axis=1))
+            inside = (inside != -1) & ~keep[local[star.simplices[inside]]].all(axis=1)
+            triangles = triangles[inside]
+
+            # Their edges which are not edges of the old triangulation
+            pairs = np.sort(np.vstack([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]]), axis=1)
+            pairs = np.unique(pairs[:, 0].astype(np.int64) * n + pairs[:, 1])
+            old = np.repeat(ring.astype(np.int64), degrees[ring]) * n + indices[edge_positions(indptr, ring)]
+            new = pairs[~np.isin(pairs, old)]
+            counts += np.bincount(np.concatenate([new // n, new % n]), minlength=n).astype(np.int32)
+
+        # The bacteria which are not vertices share the number of neighbours of their closest vertex
+        counts[coplanar[:, 0]] = counts[coplanar[:, 2]]
+        self.tri = None
+        self.n_points = 0
+        self.points = self.points[keep]
+        self.counts = counts[keep]
+
+        return
+
+
+    def _count_small(self, points):
+        '''
+        Describe:
+        Count the neighbours of fewer than 4 bacteria: one or two bacteria neighbour each other, three bacteria form a
+        triangle unless they are exactly on one line.
+
+
+        Positional arguments:
+        -> self:
+        -> points:          a n_bacteria x 2 array of bacteria positions (n_bacteria <= 3)
+
+
+        Return:
+        -> neighbours:      int array (n_bacteria) with the number of neighbours of each bacteria
+        '''
+        if len(points) <= 2:
+
+            return np.ones(len(points), dtype=np.int32)
+
+        if on_line(points):
+
+            return self._count_on_line(points)
+
+        return np.full(3, 2, dtype=np.int32)
+
+
+    def _count_on_line(self, points):
+        '''
+        Describe:
+        Count the neighbours when all bacteria are on one line: each bacteria neighbours the next one along the line.
+
+
+        Positional arguments:
+        -> self:
+        -> points:          a n_bacteria x 2 array of bacteria positions
+
+
+        Return:
+        -> neighbours:      int array (n_bacteria) with the number of neighbours of each bacteria
+        '''
+        direction = points[-1] - points[0]
+
+        if not np.any(direction):
+
+            direction = np.ptp(points, axis=0)
+
+        order = np.argsort(points @ direction, kind='stable')
+        neighbours = np.full(len(points), 2, dtype=np.int32)
+        neighbours[order[[0, -1]]] = 1
+
+        return neighbours
+
+
+def on_line(points):
+    '''
+    Describe:
+    Check whether all the bacteria are exactly on one line (or at one position).
+
+
+    Positional arguments:
+    -> points:          a n_bacteria x 2 array of bacteria positions
+
+
+    Return:
+    -> True if they are on one line
+    '''
+    distance = np.asarray(points, dtype=float) - points[0]
+    far = distance[np.argmax(np.einsum('ij,ij->i', distance, distance))]
+
+    return bool(np.all(distance[:, 0] * far[1] - distance[:, 1] * far[0] == 0))
+
+
+def edge_positions(indptr, vertices):
+    '''
+    Describe:
+    Positions in the indices of vertex_neighbor_vertices of the edges of some vertices.
+
+
+    Positional arguments:
+    -> indptr:          index pointers of vertex_neighbor_vertices
+    -> vertices:        indices of the vertices
+
+
+    Return:
+    -> positions:       positions of the neighbours of all the vertices, vertex after vertex
+    '''
+    starts = indptr[vertices]
+    lengths = indptr[vertices + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+
+    return np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
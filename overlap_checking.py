@@ -1,134 +1,223 @@
 import numpy as np
 from seperated_axis import *
-from scipy.spatial import ConvexHull
-from copy import deepcopy
-from itertools import combinations
 from fight import fight
 from check_strength import check_strength
 
 
-def overlap(step, colonies, relationship, inner_step):
+def overlap(step, colonies, relationship, inner_step, rng):
     '''
     Describe:
     Check if two colonies overlap with each other or not. If they overlap, synergistic colonies will merge into a big one. Otherwise,
     they will fight until they do not overlap.
 
+    The overlaps are resolved in rounds without recursion. In each round all overlapping pairs are found at once. Synergistic
+    colonies connected by overlaps are merged together in the same round (union-find over the overlap graph). Competitive colonies
+    fight in all overlapping pairs. The rounds go on until no colonies overlap.
+
 
     Positional arguments:
-    -> self:                
+    -> step:                    current step
     -> colonies:                a dictionary containing all colonies during the simulation
     -> relationship:            relationship between two colonies
     -> inner_step:              pseudo steps
+    -> rng:                     random Generator for the fights
 
 
     Return:
-    None
+    -> inner_step:              pseudo steps after the fights
+    -> rounds:                  number of rounds needed to resolve all overlaps
     '''
+    rounds = 0
+
+    while True:
 
-    # EXIT. Only one colony left.
-    if len(colonies.keys()) <= 1:
+        # If the colony does not contain any bacteria, then delete it from the colonies.
+        for colony in list(colonies.keys()):
 
-        check_strength(step, colonies)
+            if len(colonies[colony].points) == 0:
 
-        return inner_step
-    
-    # If fewer than three bacteria are in one colony, they cannot form a well-defiend convexhull.
-    # Another algorithm will be applied.
-    colonies_keys_1 = list(colonies.keys())
-    colonies_keys_2 = deepcopy(colonies_keys_1)
+                del colonies[colony]
 
-    for colony in colonies_keys_2:
+        # EXIT. Only one colony left.
+        if len(colonies) <= 1:
 
-        if len(colonies[colony].points) <= 3 and len(colonies[colony].points) > 0:
+            break
 
-            colonies_keys_1.remove(colony)
-        
-        elif len(colonies[colony].points) == 0:
+        overlap_colony = find_overlaps(colonies)
 
-            del colonies[colony]
-            colonies_keys_1.remove(colony)
+        # EXIT. No colonies overlap
+        if overlap_colony == list():
 
-        else:
+            break
 
-            pass
+        rounds += 1
 
-    # If the colony does not contain any bacteria, then delete it from the colonies
+        # Synergistic
+        if relationship == 'Synergistic':
 
-    # Combinations between two arbitrary colonies
-    comb = list(combinations(colonies_keys_1, 2))
-    
-    vertices_set = dict()
-    overlap_colony = list()
-    
+            # Merge every group of connected colonies into the first colony of the group
+            for base, group in merge_groups(list(colonies.keys()), overlap_colony).items():
 
-    # Generate vertices of the Convex hulls for each existing colony
-    for index in colonies_keys_1:
-        
-        convexhull = ConvexHull(colonies[index].points)       # Get convex hull model for the colony
-        points = deepcopy(colonies[index].points)
-        condition = np.array([[True, True] if i in convexhull.vertices else [False, False] for i in range(len(colonies[index].points))])
-        vertices = np.extract(condition, points)
-        vertices = vertices.reshape(int(len(vertices) / 2), 2)
-        vertices_set[index] = vertices               # five arrays of vertices for the convex hulls for each colony
+                for index in group:
 
-    # Synergistic
-    if relationship == 'Synergistic':
+                    colonies[base].merge(colonies[index])
+                    del colonies[index]
 
-        # Check whether two colonies overlap with each other or not
-        for pair in comb:
+        else:     # Competitive
 
-            check = separating_axis_theorem(vertices_set[pair[0]], vertices_set[pair[1]])
-            
-            if check:
+            inner_step = fight(step, colonies, overlap_colony, inner_step, rng)
 
-                overlap_colony = pair       # tend to merge one combination of two colonies
-                break
+    check_strength(step, colonies)
 
-            else:
+    return inner_step, rounds
+
+
+def find_overlaps(colonies):
+    '''
+    Describe:
+    Find all pairs of colonies whose convex hulls overlap. Colonies with fewer than three bacteria (or on one line) use a segment
+    or a point as their hull.
 
-                pass
-        
-        
-        # EXIT. Return when no colonies overlap
-        if overlap_colony == list():
 
-            check_strength(step, colonies)
+    Positional arguments:
+    -> colonies:                a dictionary containing all colonies during the simulation
 
-            return inner_step
 
-        else:
+    Return:
+    -> list of pairs of colony keys which overlap, in the same order as combinations(keys, 2)
+    '''
+    keys = list(colonies.keys())
+    vertices_set = list()
+    boxes = list()
+
+    # Vertices of the Convex hulls and bounding boxes for each existing colony
+    # They are cached in the colony and only computed again when its bacteria have changed
+    for index in keys:
 
-            colonies[overlap_colony[0]].merge(colonies[overlap_colony[1]])
-            del colonies[overlap_colony[1]]
+        vertices, box = colonies[index].hull()
+        vertices_set.append(vertices)
+        boxes.append(box)
 
-        inner_step = overlap(step, colonies, relationship, inner_step)
+    return overlapping_pairs(keys, vertices_set, boxes)
 
-        return inner_step
-    
-    else:     # Competitive
-        
-        # Check whether two colonies overlap with each other or not
-        for pair in comb:
 
-            check = separating_axis_theorem(vertices_set[pair[0]], vertices_set[pair[1]])
-            
-            if check:
+def overlapping_pairs(keys, vertices_set, boxes):
+    '''
+    Describe:
+    Find all pairs of convex shapes which overlap: sweep and prune on the bounding boxes, then the separating axis theorem on
+    the candidate pairs in one batch.
 
-                overlap_colony.append(pair)       # Two colonies will fight
-        
-        # Return when no colonies overlap
-        if overlap_colony == list():
 
-            check_strength(step, colonies)
+    Positional arguments:
+    -> keys:                    keys of the colonies
+    -> vertices_set:            vertices of the convex hull of each colony
+    -> boxes:                   bounding boxes of the colonies (x_min, y_min, x_max, y_max)
+
+
+    Return:
+    -> list of pairs of colony keys which overlap, in the same order as combinations(keys, 2)
+    '''
+    # Broad phase: only pairs of colonies with overlapping bounding boxes can overlap
+    comb = candidate_pairs(keys, boxes)
+
+    # Narrow phase: check whether the candidate pairs overlap with each other or not in one batch.
+    # Only the hulls of the candidate pairs are packed.
+    if len(comb) == 0:
+
+        return list()
+
+    index_of = {key: i for i, key in enumerate(keys)}
+    involved = {key: i for i, key in enumerate(dict.fromkeys(key for pair in comb for key in pair))}
+    check = separating_axis_batch([vertices_set[index_of[key]] for key in involved],
+                                  [[involved[pair[0]], involved[pair[1]]] for pair in comb])
+
+    return [pair for pair, overlapping in zip(comb, check) if overlapping]
+
+
+def merge_groups(keys, pairs):
+    '''
+    Describe:
+    Group the colonies connected by overlaps with a union-find. Each group is represented by its first colony in keys.
+
+
+    Positional arguments:
+    -> keys:                    keys of the colonies
+    -> pairs:                   pairs of overlapping colony keys
+
+
+    Return:
+    -> dictionary: first colony of the group -> list of the other colonies of the group (in the order of keys)
+    '''
+    rank = {key: i for i, key in enumerate(keys)}
+    parent = {key: key for key in keys}
+
+    def root(key):
+
+        while parent[key] != key:
+
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+
+        return key
+
+    for a, b in pairs:
+
+        root_a, root_b = root(a), root(b)
+
+        if root_a != root_b:
+
+            # The colony earlier in keys stays as the base of the group
+            if rank[root_b] < rank[root_a]:
+
+                root_a, root_b = root_b, root_a
+
+            parent[root_b] = root_a
+
+    groups = dict()
+
+    for key in keys:
+
+        base = root(key)
+
+        if base != key:
+
+            groups.setdefault(base, list()).append(key)
+
+    return groups
+
+
+def candidate_pairs(keys, boxes):
+    '''
+    Describe:
+    Broad phase of the overlap check. Sweep and prune the bounding boxes of the colonies along the x-axis and keep the pairs whose
+    boxes also overlap along the y-axis. Only these pairs need the separating axis theorem.
+
+
+    Positional arguments:
+    -> keys:                    keys of the colonies
+    -> boxes:                   bounding boxes of the colonies (x_min, y_min, x_max, y_max)
+
+
+    Return:
+    -> pairs of colony keys with overlapping bounding boxes, in the same order as combinations(keys, 2)
+    '''
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+
+    # Sort the boxes by the lower x limit
+    order = np.argsort(boxes[:, 0], kind='stable')
+    x_low_sorted = boxes[order, 0]
+    pairs = list()
 
-            return inner_step
-        
-        else:
+    for rank, i in enumerate(order):
 
-            inner_step = fight(step, colonies, overlap_colony, inner_step)
-    
-    inner_step = overlap(step, colonies, relationship, inner_step)
+        # Boxes starting before box i ends along the x-axis
+        end = np.searchsorted(x_low_sorted, boxes[i, 2], side='right')
+        others = order[rank + 1:end]
 
-    return inner_step
+        # Keep the boxes that also overlap along the y-axis
+        others = others[(boxes[others, 1] <= boxes[i, 3]) & (boxes[others, 3] >= boxes[i, 1])]
+        pairs.extend((min(i, j), max(i, j)) for j in others)
 
+    pairs.sort()
 
+    return [(keys[i], keys[j]) for i, j in pairs]
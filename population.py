@@ -0,0 +1,304 @@
+import numpy as np
+
+
+# Per-bacteria attributes stored in the population: name -> (dtype, shape of one bacteria, default value)
+FIELDS = {
+    'points':       (np.float32, (2,), 0),          # position
+    'regions':      (np.int8, (), 0),               # strip region
+    'actions':      (np.int8, (), 0),               # 1: die; 2: duplicate; 3: move
+    'birth_date':   (np.int32, (), 0),              # step when the bacteria was born
+    'ages':         (np.int32, (), 0),              # steps passing since born
+    'steps_eat':    (np.float32, (), np.inf),       # step of the last meal (Inf if never eaten)
+    'neighbours':   (np.int32, (), 0),              # number of neighbours
+    'death_rate':   (np.float32, (), 0),            # death rate
+    'strengths':    (np.float32, (), 0),            # strength
+    'colony':       (np.int32, (), 0),              # colony the bacteria was born in (world population, see world.py)
+}
+
+# Attributes computed from the others: assigning them does not mark the population as changed
+DERIVED = ('actions', 'ages', 'death_rate', 'strengths')
+
+
+class Population():
+    '''
+    Description:
+    Structure-of-arrays store of the bacteria in one colony (or in the whole world, see world.py). Each attribute in FIELDS is kept in its own buffer with a spare
+    capacity that doubles when it is full, so appending bacteria is amortized O(1) and removing bacteria compacts the buffers
+    in place instead of reallocating every attribute.
+
+
+    Attributes:
+    -> n:                                       number of bacteria in the population
+    -> capacity:                                number of bacteria the buffers can hold
+    -> data:                                    dictionary of the buffers of all attributes
+    -> version:                                 counter increased every time the bacteria change (for caches)
+    -> members:                                 counter increased every time bacteria are added or removed (for the caches
+                                                which only depend on which bacteria there are)
+    -> moves:                                   counter increased every time the positions change: bacteria are added,
+                                                removed or moved (for the caches which only depend on the positions)
+
+
+    Buit-in methods:
+    --- view:                                   the live part of one attribute
+    --- append:                                 add new bacteria
+    --- extend:                                 add all bacteria of another population
+    --- compact:                                keep the bacteria selected by a boolean mask
+    --- swap_remove:                            remove bacteria by moving the last ones into their places
+    --- touch:                                  mark the bacteria as changed after writing into a view
+    --- nbytes:                                 memory of the buffers
+    '''
+
+
+    def __init__(self, capacity=16):
+
+        self.n = 0
+        self.version = 0
+        self.members = 0
+        self.moves = 0
+        self.capacity = max(int(capacity), 1)
+        self.data = {name: np.empty((self.capacity,) + shape, dtype=dtype) for name, (dtype, shape, _) in FIELDS.items()}
+
+        return
+
+
+    def __len__(self):
+
+        return self.n
+
+
+    def nbytes(self):
+        '''
+        Describe:
+        Memory of the buffers in bytes, spare capacity included.
+        '''
+
+        return sum(buffer.nbytes for buffer in self.data.values())
+
+
+    def touch(self, moved=False):
+        '''
+        Describe:
+        Mark the bacteria as changed. Call it after writing into a view so that caches based on the population are rebuilt.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Keyward arguments:
+        -> moved:           True if the positions were written
+
+
+        Return:
+        None
+        '''
+        self.version += 1
+
+        if moved:
+
+            self.moves += 1
+
+        return
+
+
+    def view(self, name):
+        '''
+        Describe:
+        Return the live part of one attribute. The view shares the memory with the buffer.
+
+
+        Positional arguments:
+        -> self:
+        -> name:            name of the attribute in FIELDS
+
+
+        Return:
+        -> array with the attribute for all the bacteria in the population
+        '''
+
+        return self.data[name][:self.n]
+
+
+    def reserve(self, n_total):
+        '''
+        Describe:
+        Make sure the buffers can hold n_total bacteria. The capacity is at least doubled when it grows.
+
+
+        Positional arguments:
+        -> self:
+        -> n_total:         number of bacteria to hold
+
+
+        Return:
+        None
+        '''
+        if n_total <= self.capacity:
+
+            return
+
+        capacity = max(int(n_total), 2 * self.capacity)
+
+        for name, buffer in self.data.items():
+
+            new_buffer = np.empty((capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            new_buffer[:self.n] = buffer[:self.n]
+            self.data[name] = new_buffer
+
+        self.capacity = capacity
+
+        return
+
+
+    def append(self, n_new, **values):
+        '''
+        Describe:
+        Add new bacteria at the end of the population. Attributes that are not given take their default values from FIELDS.
+
+
+        Positional arguments:
+        -> self:
+        -> n_new:           number of the new bacteria
+
+
+        Keyward arguments:
+        -> values:          attribute name -> array (or scalar) for the new bacteria
+
+
+        Return:
+        -> slice of the new bacteria in the population
+        '''
+        start = self.n
+        self.reserve(start + n_new)
+
+        for name, (_, _, default) in FIELDS.items():
+
+            self.data[name][start:start + n_new] = values.get(name, default)
+
+        self.n += n_new
+        self.members += 1
+        self.touch(moved=True)
+
+        return slice(start, self.n)
+
+
+    def extend(self, other):
+        '''
+        Describe:
+        Add all bacteria of another population at the end of this one.
+
+
+        Positional arguments:
+        -> self:
+        -> other:           Population to copy the bacteria from
+
+
+        Return:
+        -> slice of the new bacteria in the population
+        '''
+
+        return self.append(len(other), **{name: other.view(name) for name in FIELDS})
+
+
+    def compact(self, keep):
+        '''
+        Describe:
+        Keep only the bacteria selected by the mask. The order of the survivors is unchanged.
+
+
+        Positional arguments:
+        -> self:
+        -> keep:            boolean array (n) which is True for the bacteria that stay
+
+
+        Return:
+        None
+        '''
+        keep = np.asarray(keep, dtype=bool).reshape(self.n)
+        n_keep = int(np.count_nonzero(keep))
+
+        if n_keep == self.n:
+
+            return
+
+        for buffer in self.data.values():
+
+            buffer[:n_keep] = buffer[:self.n][keep]
+
+        self.n = n_keep
+        self.members += 1
+        self.touch(moved=True)
+
+        return
+
+
+    def swap_remove(self, index):
+        '''
+        Describe:
+        Remove the bacteria with the given indices by moving the last bacteria into the holes. The order of the survivors
+        is not kept.
+
+
+        Positional arguments:
+        -> self:
+        -> index:           indices of the bacteria to remove
+
+
+        Return:
+        None
+        '''
+        index = np.unique(np.asarray(index, dtype=np.intp).reshape(-1))
+
+        if len(index) == 0:
+
+            return
+
+        n_keep = self.n - len(index)
+
+        # Holes in the part that stays, filled by the survivors from the tail
+        holes = index[index < n_keep]
+        tail = np.ones(self.n - n_keep, dtype=bool)
+        tail[index[index >= n_keep] - n_keep] = False
+        fillers = np.flatnonzero(tail) + n_keep
+
+        for buffer in self.data.values():
+
+            buffer[holes] = buffer[fillers]
+
+        self.n = n_keep
+        self.members += 1
+        self.touch(moved=True)
+
+        return
+
+
+def field(name):
+    '''
+    Describe:
+    Property exposing one attribute of the population of a colony. Assigning to it writes into the population buffer, so the
+    new value must cover all the bacteria (or be a scalar). Assigning any attribute but the DERIVED ones marks the population as
+    changed.
+
+
+    Positional arguments:
+    -> name:            name of the attribute in FIELDS
+
+
+    Return:
+    -> property
+    '''
+
+    def getter(self):
+
+        return self.population.view(name)
+
+    def setter(self, value):
+
+        self.population.view(name)[...] = value
+
+        # Derived attributes are recomputed from the others, which are the only ones the caches depend on
+        if name not in DERIVED:
+
+            self.population.touch(moved=name == 'points')
+
+    return property(getter, setter)
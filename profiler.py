@@ -0,0 +1,165 @@
+import contextlib
+import csv
+import json
+import time
+
+# Phases of a step in the order they run
+PHASES = ('overlap', 'region_check', 'calNeighbours', 'eat', 'k_die', 'action', 'displacement', 'duplicate', 'die')
+
+# Counts recorded for each step
+COUNTS = ('births', 'deaths', 'meals', 'fights', 'merges', 'population', 'colonies')
+
+# Shared context which does nothing, used when the profiler is off
+NULL_PHASE = contextlib.nullcontext()
+
+
+def no_phase(name):
+    '''
+    Describe:
+    Phase of a simulation without profiler: nothing is timed.
+    '''
+
+    return NULL_PHASE
+
+
+class StepProfiler():
+    '''
+    Description:
+    Record the wall time of each phase of each step of a simulation, with the population and the counts of births, deaths,
+    meals, fights and merges. A phase is timed once for all the colonies (which may run on a thread pool, see
+    simulation.Config), and the calls of a phase in the same step are summed. The records can be saved as JSONL, CSV or as a
+    Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+
+
+    Attributes:
+    -> records:                                 one dictionary per step: step, total time, time of each phase and counts
+    -> events:                                  (phase, start, duration, step) of every timed call, for the Chrome trace
+    -> origin:                                  start time of the profiler
+
+
+    Buit-in methods:
+    --- begin:                                  start a step
+    --- phase:                                  context timing one call of a phase
+    --- count:                                  add to the counts of the current step
+    --- end:                                    finish a step
+    --- save:                                   save the records (format from the extension of the path)
+    '''
+
+
+    def __init__(self):
+
+        self.records = list()
+        self.events = list()
+        self.origin = time.perf_counter()
+        self.current = None
+
+        return
+
+
+    def begin(self, step):
+
+        self.current = {'step': step, 'total': 0.0}
+        self.current.update({phase: 0.0 for phase in PHASES})
+        self.current.update({name: 0 for name in COUNTS})
+        self.start = time.perf_counter()
+
+        return
+
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        '''
+        Describe:
+        Time one call of a phase and add it to the time of the phase in the current step.
+
+
+        Positional arguments:
+        -> self:
+        -> name:                name of the phase (see PHASES)
+        '''
+        start = time.perf_counter()
+
+        try:
+
+            yield
+
+        finally:
+
+            duration = time.perf_counter() - start
+            self.current[name] += duration
+            self.events.append((name, start, duration, self.current['step']))
+
+
+    def count(self, **counts):
+
+        for name, value in counts.items():
+
+            self.current[name] += int(value)
+
+        return
+
+
+    def end(self):
+
+        self.current['total'] = time.perf_counter() - self.start
+        self.events.append(('step', self.start, self.current['total'], self.current['step']))
+        self.records.append(self.current)
+        self.current = None
+
+        return
+
+
+    def save(self, path):
+        '''
+        Describe:
+        Save the records. The format comes from the extension of the path: .jsonl (one line per step), .csv (one row per step)
+        or .json (Chrome trace with one event per timed call and counters for the population).
+
+
+        Positional arguments:
+        -> self:
+        -> path:                path of the file
+
+
+        Return:
+        None
+        '''
+        with open(path, 'w', newline='') as file:
+
+            if path.endswith('.csv'):
+
+                writer = csv.DictWriter(file, fieldnames=['step', 'total', *PHASES, *COUNTS])
+                writer.writeheader()
+                writer.writerows(self.records)
+
+            elif path.endswith('.json'):
+
+                json.dump({'traceEvents': self.trace(), 'displayTimeUnit': 'ms'}, file)
+
+            else:
+
+                for record in self.records:
+
+                    file.write(json.dumps(record) + '\n')
+
+        return
+
+
+    def trace(self):
+        '''
+        Describe:
+        Events of the Chrome trace format: a complete event for every timed call (the steps on their own row) and a counter
+        event for the population after each step.
+        '''
+        events = [{'name': name, 'cat': 'step' if name == 'step' else 'phase', 'ph': 'X', 'pid': 0, 'tid': int(name != 'step'),
+                   'ts': 1e6 * (start - self.origin), 'dur': 1e6 * duration, 'args': {'step': step}}
+                  for name, start, duration, step in self.events]
+
+        ends = {step: start + duration for name, start, duration, step in self.events if name == 'step'}
+
+        for record in self.records:
+
+            events.append({'name': 'population', 'ph': 'C', 'pid': 0, 'ts': 1e6 * (ends[record['step']] - self.origin),
+                           'args': {'bacteria': record['population'], 'colonies': record['colonies']}})
+
+        return events
@@ -0,0 +1,102 @@
+import os
+import matplotlib.pyplot as plt
+from simulation import Observer
+
+
+class Renderer(Observer):
+    '''
+    Description:
+    Draw the food, the bacteria and the convex hull of each colony and save the figure. The simulation itself never imports
+    matplotlib: rendering is only done when a Renderer is attached, and only every "every" steps.
+
+
+    Attributes:
+    -> path:                    path of the figures, formatted with the step (for example 'figure/strip_{step}.png')
+    -> every:                   number of steps between two figures (0: only the final figure)
+    -> size:                    size of the figure in inches
+
+
+    Buit-in methods:
+    --- draw:                   draw the state of the simulation and save it
+    '''
+
+
+    def __init__(self, path, every=0, size=8):
+
+        self.path = path
+        self.every = every
+        self.size = size
+        self.fig = None
+        self.ax = None
+
+        return
+
+
+    def start(self, simulation):
+
+        c = simulation.config
+
+        self.fig, self.ax = plt.subplots()
+        self.fig.set_size_inches(self.size, self.size)
+        self.limits = ([c.x_low, c.x_high], [c.y_low, c.y_high])
+
+        directory = os.path.dirname(self.path)
+
+        if directory:
+
+            os.makedirs(directory, exist_ok=True)
+
+        return
+
+
+    def step(self, simulation, step):
+
+        self.draw(simulation, step)
+
+        return
+
+
+    def end(self, simulation, result):
+
+        self.draw(simulation, result.steps)
+        plt.close(self.fig)
+
+        return
+
+
+    def draw(self, simulation, step):
+        '''
+        Describe:
+        Draw the state of the simulation and save the figure.
+
+
+        Positional arguments:
+        -> self:
+        -> simulation:          Simulation to draw
+        -> step:                current step
+
+
+        Return:
+        None
+        '''
+        ax = self.ax
+        ax.cla()
+        ax.set_xlim(self.limits[0])
+        ax.set_ylim(self.limits[1])
+
+        # Food left on the surface
+        food_positions = simulation.food.remaining
+        ax.scatter(food_positions[:, 0], food_positions[:, 1], s=2, color='red')
+
+        for points, vertices in simulation.shapes():
+
+            # Bacteria
+            ax.scatter(points[:, 0], points[:, 1], s=8)
+
+            # Convex hull of the colony (closed)
+            outline = vertices[list(range(len(vertices))) + [0]]
+            ax.plot(outline[:, 0], outline[:, 1], 'k-')
+
+        self.fig.savefig(self.path.format(step=step))
+
+        return
@@ -1,165 +1,128 @@
 import numpy as np
 
-def normalize(vect):
+def hull_axes(vertices):
     '''
         --------------------------------------------------------Goal---------------------------------------------------------------------
-        # normalises the input vector using pathagoras 
+        # Candidate separating axes of one convex shape: the vectors orthogonal to its edges. A segment (two points) also gives its
+        # own direction so that collinear shapes can be separated. A single point gives no axis.
 
         --------------------------------------------------------Input--------------------------------------------------------------------
-        -> vector in question 
-        -> 
-        
+        -> vertices of the convex shape in order (n x 2)
+
         --------------------------------------------------------Return-------------------------------------------------------------------
-        Returns normalised vector
+        Returns axes (k x 2), not normalised [the overlap test does not depend on the length of the axes]
         '''
-    
-    from math import sqrt
-    norm = sqrt(vect[0] ** 2 + vect[1] ** 2)
 
-    return (vect[0] / norm, vect[1] / norm)
+    vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
 
+    if len(vertices) < 2:
+        return np.zeros((0, 2))
 
+    edges = np.roll(vertices, -1, axis=0) - vertices           # vector directions between all points of the convex shape
 
+    if len(vertices) == 2:
+        edges = edges[:1]
+        axes = np.vstack([edges[:, ::-1] * [1, -1], edges])     # orthogonal vector and direction of the segment
+    else:
+        axes = edges[:, ::-1] * [1, -1]                         # orthogonal vectors (v[1], -v[0])
 
-def edge_direction(vect0, vect1):
-    '''
-        --------------------------------------------------------Goal---------------------------------------------------------------------
-        ## gives direction between two points by subtracting the associated vectors [direction given as a new vector]
+    return axes[np.any(axes != 0, axis=1)]
 
-        --------------------------------------------------------Input--------------------------------------------------------------------
-        -> vector0 in question 
-        -> vector1 in question
-        
-        --------------------------------------------------------Return-------------------------------------------------------------------
-        Returns vector connecting the two input vectors
-        '''
-
-    return (vect1[0] - vect0[0], vect1[1] - vect0[1])
 
-
-def orthogonal(v):
+def pad_vertices(hulls):
     '''
         --------------------------------------------------------Goal---------------------------------------------------------------------
-        # Produces orthogonal vector
+        # Pack shapes with different numbers of vertices into one array. Missing vertices repeat the first vertex of the shape so that
+        # the projections are not changed
 
         --------------------------------------------------------Input--------------------------------------------------------------------
-        -> vector
-        
-        --------------------------------------------------------Return-------------------------------------------------------------------
-        Returns othogonal vector
-        '''
-    return (v[1], -v[0])
+        -> list of vertex arrays
 
- 
-def vertices_to_edges(vertices):
-    '''
-        --------------------------------------------------------Goal---------------------------------------------------------------------
-        #finds vector direction between all points of the convex shape
-        --------------------------------------------------------Input--------------------------------------------------------------------
-        -> vertex points
-        
         --------------------------------------------------------Return-------------------------------------------------------------------
-        edges
+        Returns an array (n_shapes x max_vertices x 2)
         '''
-    
-    return [edge_direction(vertices[i], vertices[(i + 1) % len(vertices)]) \
 
-        for i in range(len(vertices))]
+    size = max(len(vertices) for vertices in hulls)
+    packed = np.empty((len(hulls), size, 2))
 
+    for i, vertices in enumerate(hulls):
+        packed[i, :len(vertices)] = vertices
+        packed[i, len(vertices):] = vertices[0]
 
-def project(vertices, axis):
+    return packed
+
+
+def pad_axes(hulls):
     '''
         --------------------------------------------------------Goal---------------------------------------------------------------------
-        # Projection onto vector using dot product
+        # Pack the candidate axes of all shapes into one array. Missing axes are zero vectors, which never separate two shapes
 
         --------------------------------------------------------Input--------------------------------------------------------------------
-        -> verticies
-        -> axis in question
-        
+        -> list of vertex arrays
+
         --------------------------------------------------------Return-------------------------------------------------------------------
-        Returns othogonal vector
+        Returns an array (n_shapes x max_axes x 2)
         '''
 
-    dots = [np.dot(vertex, axis) for vertex in vertices]
+    axes = [hull_axes(vertices) for vertices in hulls]
+    size = max(1, max(len(axis) for axis in axes))
+    packed = np.zeros((len(hulls), size, 2))
 
-    return [min(dots), max(dots)]
+    for i, axis in enumerate(axes):
+        packed[i, :len(axis)] = axis
 
+    return packed
 
-def contains(n, range_):
 
+def separating_axis_batch(hulls, pairs):
     '''
         --------------------------------------------------------Goal---------------------------------------------------------------------
-        # Check if projected points from one shape lie within the line overlapping with points from other shape in question
+        # Separating axis theorem for a batch of pairs of convex shapes. Every vertex of both shapes of every pair is projected onto
+        # every candidate axis of the pair with one matrix multiply. Two shapes overlap if their projections overlap on all axes.
+        # Shapes can be polygons, segments (2 points) or points (1 point)
 
         --------------------------------------------------------Input--------------------------------------------------------------------
-        -> n
-        -> range
-        
+        -> list of vertex arrays of the convex shapes (in order around the shape)
+        -> pairs of indices into the list (n_pairs x 2)
+
         --------------------------------------------------------Return-------------------------------------------------------------------
-        Returns points overlapping
+        Returns a boolean array (n_pairs): True for overlap, False for no overlap
         '''
 
-    a = range_[0]
-    b = range_[1]
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
 
-    if b < a:
-        a = range_[1]
-        b = range_[0]
+    if len(pairs) == 0:
+        return np.zeros(0, dtype=bool)
 
-    return (n >= a) and (n <= b)
+    vertices = pad_vertices(hulls)
+    axes = pad_axes(hulls)
 
+    vertices_a = vertices[pairs[:, 0]]
+    vertices_b = vertices[pairs[:, 1]]
 
-def overlap_(a, b):
-    '''
-        --------------------------------------------------------Goal---------------------------------------------------------------------
-        # Check overlap
+    # Axes of both shapes and the direction between their first vertices (separates two points)
+    axes = np.concatenate([axes[pairs[:, 0]], axes[pairs[:, 1]], (vertices_b[:, 0] - vertices_a[:, 0])[:, None, :]], axis=1)
 
-        --------------------------------------------------------Input--------------------------------------------------------------------
-        -> two sets of points (a,b)
-        
-        --------------------------------------------------------Return-------------------------------------------------------------------
-        Returns True for overlap, False for no overlap
-        '''
-
-    if contains(a[0], b):
-        return True
+    # Projections onto all axes (n_pairs x n_vertices x n_axes)
+    projection_a = np.einsum('pvd,pkd->pvk', vertices_a, axes)
+    projection_b = np.einsum('pvd,pkd->pvk', vertices_b, axes)
 
-    if contains(a[1], b):
-        return True
+    # Separated on one axis if one projection ends before the other one starts
+    separated = (projection_a.max(axis=1) < projection_b.min(axis=1)) | (projection_b.max(axis=1) < projection_a.min(axis=1))
 
-    if contains(b[0], a):
-        return True
+    return ~np.any(separated, axis=1)
 
-    if contains(b[1], a):
-        return True
-
-    return False
- 
 
 def separating_axis_theorem(vertices_a, vertices_b):
-
-    edges_a = vertices_to_edges(vertices_a);    #array of vectors representing all the edges on the convex shape a
-    # print(edges_a)
-    edges_b = vertices_to_edges(vertices_b);    #array of vectors representing all the edges on the convex shape b
-    # print(edges_b)
-
-    edges = edges_a + edges_b                  #sum of vector directions of whole shape
-    '''
-    print(edges)
-    print(edges[1])
-    print(edges[0])
-    print(len(edges))
     '''
+        --------------------------------------------------------Goal---------------------------------------------------------------------
+        # Check overlap of two convex shapes
 
-    axes = [normalize(orthogonal(edge)) for edge in edges]         #cyles through the edges. Finds the vectors othogonal to each 
-    # print(axes)                                                  #edge vector and normalises it 
-
-    for i in range(len(axes)):
-        projection_a = project(vertices_a, axes[i])
-        projection_b = project(vertices_b, axes[i])
-        overlapping = overlap_(projection_a, projection_b)
+        --------------------------------------------------------Input--------------------------------------------------------------------
+        -> two sets of vertices (a,b)
 
-        if not overlapping:
-            return False
+        --------------------------------------------------------Return-------------------------------------------------------------------
+        Returns True for overlap, False for no overlap
+        '''
 
-    return True
\ No newline at end of file
+    return bool(separating_axis_batch([vertices_a, vertices_b], [[0, 1]])[0])
@@ -0,0 +1,766 @@
+import numpy as np
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Colony import Colony
+from profiler import no_phase
+from food import drop_food, Food, feed
+from overlap_checking import overlap
+from journal import save_checkpoint, load_checkpoint
+
+# Reasons why a simulation stopped (Result.stop_reason)
+STOP_REASONS = {
+    'n_step':           'the last step was run',
+    'extinct':          'all bacteria died',
+    'half_life':        'the population dropped to half (competitive)',
+    'no_half_life':     'the half life cannot be reached any more (competitive)',
+    'population':       'the population reached max_population',
+    'plateau':          'the growth rate stayed within plateau_tolerance for plateau_window steps',
+    'time':             'the run took max_seconds',
+    'memory':           'the bacteria took max_memory',
+}
+
+# Stops by a budget: the outcome of the simulation is not decided, so a sweep runs it again
+BUDGET_STOPS = ('time', 'memory')
+
+
+class Config():
+    '''
+    Description:
+    Parameters of one simulation. The defaults are the ones of the sweep in analysis.py.
+
+
+    Attributes:
+    -> n_step:                  number of steps to run
+    -> n_colony:                number of colonies for the model
+    -> n_bacteria:              number of bacteria for each colony
+    -> n_food:                  number of food for bacteria to take
+    -> x_low:                   lower X limit of the dimension of the surface
+    -> x_high:                  higher X limit of the dimension of the surface
+    -> y_low:                   lower Y limit of the dimension of the surface
+    -> y_high:                  higher Y limit of the dimension of the surface
+    -> radius:                  initial radius of the colony
+    -> eat_distance:            prey distance for bacteria to eat
+    -> k_die_0:                 death rate when no bacteria from the same colony surround
+    -> k_duplicate:             duplicate rate for each bacteria as two
+    -> k_move:                  move rate for bacteria
+    -> mu:                      mean of the normal distribution for bacteria movement
+    -> std:                     standard deviation of the normal distribution for bacteria movement
+    -> born_radius:             region where new duplicated bacteria can be placed
+    -> vertices_y:              y coordinates of the strip vertices (one combination from strip.strip).
+                                None: the whole surface is one uncoated strip.
+    -> relationship:            relationship between colonies ('Synergistic' or 'Competitive')
+    -> checkpoint:              path of the checkpoint file (None: no checkpoint). If the file exists, the simulation resumes
+                                from it.
+    -> checkpoint_every:        number of steps between two checkpoints
+    -> seed:                    seed of the simulation: int or SeedSequence (None: fresh entropy). The food, the fights and each
+                                colony get their own random stream spawned from it, so a run is reproduced by its seed.
+    -> engine:                  'colonies': a Colony object for each colony (reference);
+                                'world': all bacteria in one population tagged with their colony (see world.py)
+    -> backend:                 backend of the per-bacteria kernels and of the choice of the food: 'numpy' (reference) or
+                                'numba' (compiled, needs Numba; see kernels.py). Both consume the same random streams.
+    -> threads:                 number of threads running the per-colony work of a step (triangulations, hulls, actions,
+                                moves, duplication) at the same time. 1: no thread pool; 0 or None: all cores. The food is
+                                shared, so the colonies eat one after the other in a separate phase, and each colony
+                                draws from its own random stream: the result does not depend on the number of threads.
+    -> max_population:          stop when the population reaches this number of bacteria (None: no cap)
+    -> plateau_window:          stop when the growth rate of the population (relative change per step) has stayed within
+                                plateau_tolerance for this number of steps, i.e. the growth is steady and the outcome is
+                                decided (0: never)
+    -> plateau_tolerance:       largest change of the growth rate over the window of a plateau
+    -> max_seconds:             stop when the run (in this process) has taken this wall time in seconds (None: no budget)
+    -> max_memory:              stop when the buffers of the bacteria take this memory in MB (None: no budget)
+    '''
+
+
+    def __init__(self, n_step=20, n_colony=5, n_bacteria=100, n_food=2000,
+                 x_low=0, x_high=10, y_low=0, y_high=10, radius=2,
+                 eat_distance=1, k_die_0=5, k_duplicate=5, k_move=50, mu=0, std=1, born_radius=0.001,
+                 vertices_y=None, relationship='Synergistic', checkpoint=None, checkpoint_every=10, seed=None,
+                 engine='colonies', backend='numpy', threads=1,
+                 max_population=None, plateau_window=0, plateau_tolerance=0.01, max_seconds=None, max_memory=None):
+
+        self.n_step = n_step
+        self.n_colony = n_colony
+        self.n_bacteria = n_bacteria
+        self.n_food = n_food
+        self.x_low = x_low
+        self.x_high = x_high
+        self.y_low = y_low
+        self.y_high = y_high
+        self.radius = radius
+        self.eat_distance = eat_distance
+        self.k_die_0 = k_die_0
+        self.k_duplicate = k_duplicate
+        self.k_move = k_move
+        self.mu = mu
+        self.std = std
+        self.born_radius = born_radius
+        self.vertices_y = np.asarray([y_low, y_high] if vertices_y is None else vertices_y, dtype=float)
+        self.relationship = relationship
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.seed = seed
+        self.engine = engine
+        self.backend = backend
+        self.threads = threads
+        self.max_population = max_population
+        self.plateau_window = plateau_window
+        self.plateau_tolerance = plateau_tolerance
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+
+        return
+
+
+class Result():
+    '''
+    Description:
+    Outcome of one simulation.
+
+
+    Attributes:
+    -> half_life:               step when the population dropped to half (competitive), 'N/A' if it cannot be reached,
+                                None if the simulation ran to the end or all bacteria died
+    -> steps:                   number of the last step that was run
+    -> population:              total number of bacteria at the end
+    -> n_colonies:              number of colonies at the end
+    -> overlap_rounds:          number of overlap resolution rounds of each step
+    -> stop_reason:             why the simulation stopped (a key of STOP_REASONS)
+    '''
+
+
+    def __init__(self, half_life, steps, population, n_colonies, overlap_rounds, stop_reason='n_step'):
+
+        self.half_life = half_life
+        self.steps = steps
+        self.population = population
+        self.n_colonies = n_colonies
+        self.overlap_rounds = overlap_rounds
+        self.stop_reason = stop_reason
+
+        return
+
+
+class Observer():
+    '''
+    Description:
+    Hook called by the simulation. Subclasses override the methods they need. The step method is only called every "every" steps
+    (never if every is 0), so expensive observers (such as rendering) can be sampled.
+
+
+    Attributes:
+    -> every:                   number of steps between two calls of step
+
+
+    Buit-in methods:
+    --- start:                  called after the initiation
+    --- step:                   called after a step
+    --- end:                    called with the result at the end of the simulation
+    '''
+
+    every = 1
+
+
+    def start(self, simulation):
+
+        return
+
+
+    def step(self, simulation, step):
+
+        return
+
+
+    def end(self, simulation, result):
+
+        return
+
+
+class ProgressPrinter(Observer):
+    '''
+    Description:
+    Print the change of the population and the number of overlap resolution rounds after each step, and why the simulation
+    stopped at the end.
+    '''
+
+
+    def step(self, simulation, step):
+
+        print('')
+
+        # Negative number for population drop. Positive for growth.
+        print('Die: {}'.format(simulation.population() - simulation.initial_population))
+        print('Overlap rounds: {}'.format(simulation.overlap_rounds[-1]))
+
+        return
+
+
+    def end(self, simulation, result):
+
+        print('Stop at step {0}: {1}'.format(result.steps, STOP_REASONS[result.stop_reason]))
+
+        return
+
+
+class Simulation():
+    '''
+    Description:
+    Headless simulation of the bacteria colonies on the strips. It only uses numpy and scipy; plotting and printing are observers.
+
+
+    Attributes:
+    -> config:                  Config of the simulation
+    -> observers:               list of Observer
+    -> colonies:                colony dictionary
+    -> food:                    Food store
+    -> rng:                     random Generator of the food and the fights (the colonies have their own)
+    -> step_count:              last step that was run
+    -> initial_population:      total number of bacteria at the beginning
+    -> overlap_rounds:          number of overlap resolution rounds of each step
+    -> profiler:                StepProfiler timing the phases of each step (None: off)
+    -> executor:                thread pool of the per-colony work (None: not started or config.threads is 1)
+    -> populations:             total number of bacteria at the beginning and after each step (for the stopping rules)
+    -> start_time:              wall time when the run started in this process
+
+
+    Buit-in methods:
+    --- initiate:               create the colonies and the food
+    --- advance:                run one step
+    --- check_half_life:        check the end conditions of the competitive mode
+    --- check_stop:             check the stopping rules of the config
+    --- memory:                 memory of the bacteria buffers
+    --- population:             total number of bacteria
+    --- colony_sizes:           number of bacteria in each colony
+    --- shapes:                 bacteria and convex hull of each colony
+    --- state:                  state saved in the checkpoints
+    --- restore:                restore the state of a checkpoint
+    --- run:                    run the whole simulation
+    --- each:                   apply a function to every colony (on the thread pool if there is one)
+    --- pool:                   thread pool of the per-colony work
+    --- close:                  stop the thread pool
+    '''
+
+
+    def __init__(self, config, observers=(), profiler=None):
+
+        self.config = config
+        self.observers = list(observers)
+        self.colonies = dict()
+        self.food = None
+        self.rng = None
+        self.step_count = 0
+        self.initial_population = config.n_colony * config.n_bacteria
+        self.overlap_rounds = list()
+        self.profiler = profiler
+        self.phase = no_phase if profiler is None else profiler.phase
+        self.executor = None
+        self.populations = list()
+        self.start_time = None
+
+        return
+
+
+    def each(self, function, items):
+        '''
+        Describe:
+        Apply a function to every item, on the thread pool when config.threads is not 1 (the pool is started at the first
+        call). NumPy and the Qhull triangulations of SciPy release the GIL, so the colonies are processed on several cores.
+
+
+        Positional arguments:
+        -> self:
+        -> function:            function of one item
+        -> items:               items (colonies)
+
+
+        Return:
+        -> results:             list of the results in the order of the items
+        '''
+        executor = self.pool()
+
+        if executor is None:
+
+            return [function(item) for item in items]
+
+        return list(executor.map(function, items))
+
+
+    def pool(self):
+        '''
+        Describe:
+        Thread pool of the per-colony work, started at the first call.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Return:
+        -> executor:            ThreadPoolExecutor (None if config.threads is 1)
+        '''
+        if self.config.threads != 1 and self.executor is None:
+
+            self.executor = ThreadPoolExecutor(max_workers=self.config.threads or os.cpu_count())
+
+        return self.executor
+
+
+    def close(self):
+
+        if self.executor is not None:
+
+            self.executor.shutdown()
+            self.executor = None
+
+        return
+
+
+    def population(self):
+        '''
+        Describe:
+        Total number of bacteria in all colonies.
+        '''
+
+        return sum(len(colony.points) for colony in self.colonies.values())
+
+
+    def colony_sizes(self):
+        '''
+        Describe:
+        Number of bacteria in each colony.
+        '''
+
+        return [len(colony.points) for colony in self.colonies.values()]
+
+
+    def shapes(self):
+        '''
+        Describe:
+        Positions of the bacteria and vertices of the convex hull of each colony.
+        '''
+
+        return [(colony.points, colony.hull()[0]) for colony in self.colonies.values()]
+
+
+    def state(self):
+        '''
+        Describe:
+        Picklable state of the simulation saved in the checkpoints. The Generators are saved with it, so a resumed run draws
+        the same numbers.
+        '''
+
+        return (self.colonies, self.food, self.step_count, self.rng, self.populations, self.overlap_rounds)
+
+
+    def restore(self, state):
+        '''
+        Describe:
+        Restore the state saved by state.
+        '''
+        self.colonies, self.food, self.step_count, self.rng, self.populations, self.overlap_rounds = state
+
+        return
+
+
+    def initiate(self):
+        '''
+        Describe:
+        Drop the food and create the colonies with their bacteria.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Return:
+        None
+        '''
+        c = self.config
+
+        # One random stream for the food and the fights and one for each colony
+        seed = c.seed if isinstance(c.seed, np.random.SeedSequence) else np.random.SeedSequence(c.seed)
+        streams = seed.spawn(c.n_colony + 1)
+        self.rng = np.random.default_rng(streams[0])
+
+        # Get initial positions of all the food, in a KD-tree store of (n_food, 2) positions
+        self.food = Food(drop_food(c.n_food, c.x_low, c.x_high, c.y_low, c.y_high, self.rng), c.backend)
+
+        # A dictionary to manage all colonies
+        colonies = self.colonies
+
+        # Initiation of colonies
+        for i in range(c.n_colony):
+
+            # Set the colony class
+            colonies[i] = Colony()
+
+            # Set the inital dimension and position of the colony
+            # Attr: relationship, inital x and y positions, radius
+            index = i + 1     # index for competitive relationship
+            colonies[i].create_colony(c.x_low, c.x_high, c.y_low, c.y_high, c.n_bacteria, c.radius, index, c.relationship,
+                                      streams[i + 1], c.backend)
+
+            # Set the initial position of the bacteria in the colony
+            # Attr: initial number of bacteria with their positions
+            #       k_duplicate, k_move
+            colonies[i].bacteria_preparation(c.n_bacteria, c.k_duplicate, c.k_move, c.k_die_0)
+
+            # Check the region for each bacteria
+            # Attr: regions
+            colonies[i].region_check(c.vertices_y)
+
+            # Check the number of the neighbours for each bacteria
+            colonies[i].calNeighbours()
+
+            # Record the initial step for the bacteria
+            # Attr: age
+            colonies[i].birth_date = 0
+
+            # Eat food
+            # Attr: steps_eat
+            colonies[i].eat(0, self.food, c.eat_distance)
+
+            # Set the strength based on the age, number_colony and steps_eat
+            # Attr: bacteria_positions, neighbours, steps_eat, death_rate, actions, birth_date, strength
+            colonies[i].strength_check(1, colonies)
+
+            # Add actions
+            colonies[i].actions = 0
+
+            # Add death rate
+            colonies[i].death_rate = 0
+
+        return
+
+
+    def advance(self, step):
+        '''
+        Describe:
+        Run one step of the simulation: resolve overlaps, then every bacteria eats, chooses and takes its action.
+
+
+        Positional arguments:
+        -> self:
+        -> step:                current step
+
+
+        Return:
+        -> total_bacteria:      total number of bacteria after the step
+        '''
+        c = self.config
+        colonies = self.colonies
+        phase = self.phase
+        profiler = self.profiler
+
+        if profiler is not None:
+
+            profiler.begin(step)
+            n_colonies = len(colonies)
+            n_food = self.food.n_alive
+
+        # Check overlapping situation (the convex hulls of all colonies are computed at the same time first)
+        with phase('overlap'):
+
+            if len(colonies) > 1:
+
+                self.each(Colony.hull, colonies.values())
+
+            inner_step, rounds = overlap(step, colonies, c.relationship, step, self.rng)
+
+        self.overlap_rounds.append(rounds)
+
+        # Check region for bacteria
+        with phase('region_check'):
+
+            self.each(lambda colony: colony.region_check(c.vertices_y), colonies.values())
+
+        # Calculate the inital neighbour of each bacteria
+        # Attr: bacteria_positions, neighbours, birth_date
+        with phase('calNeighbours'):
+
+            self.each(Colony.calNeighbours, colonies.values())
+
+        # Bacteria of all colonies eat the food around them in one batched pass.
+        # Attr: steps_eat
+        with phase('eat'):
+
+            feed(colonies, self.food, step, c.eat_distance, self.rng)
+
+        # Calculate the death rate of each bacteria
+        # Attr: bacteria_positions, neighbours, steps_eat, death_rate, birth_date
+        with phase('k_die'):
+
+            self.each(lambda colony: colony.k_die(step, colonies), colonies.values())
+
+        # Choose action for each bacteria
+        # Attr: bacteria_positions, neighbours, steps_eat, death_rate, actions, birth_date
+        with phase('action'):
+
+            self.each(Colony.action, colonies.values())
+
+        if profiler is not None:
+
+            # Colonies only disappear by merging in the synergistic mode (empty ones are removed before)
+            actions = [colony.actions for colony in colonies.values()]
+            profiler.count(births=sum(np.count_nonzero(a == 2) for a in actions),
+                           deaths=sum(np.count_nonzero(a == 1) for a in actions),
+                           fights=inner_step - step,
+                           merges=n_colonies - len(colonies) if c.relationship == 'Synergistic' else 0)
+
+        # Start to behave what action implies
+        # All three actions in the same step
+        with phase('displacement'):
+
+            self.each(lambda colony: colony.displacement(c.mu, c.std, c.vertices_y, c.x_low, c.x_high, c.y_low, c.y_high),
+                      colonies.values())
+
+        # Duplicate: the colonies place their new bacteria at the same time, then the new bacteria eat colony by colony in the
+        # order of the keys, so the food goes to the same bacteria with any number of threads
+        with phase('duplicate'):
+
+            new_born = self.each(lambda colony: colony.breed(step, c.vertices_y, c.born_radius, c.x_low, c.x_high, c.y_low,
+                                                             c.y_high, colonies), colonies.values())
+
+            for colony, born in zip(colonies.values(), new_born):
+
+                colony.feed_newborn(born, self.food, c.eat_distance, step)
+
+        # Die
+        with phase('die'):
+
+            self.each(Colony.die, colonies.values())
+
+        # If all bacteria in the colony die out, remove the colony from colonies
+        for i in [i for i in colonies.keys() if len(colonies[i].points) == 0]:
+
+            del colonies[i]
+
+        self.step_count = step
+        total_bacteria = self.population()
+
+        if profiler is not None:
+
+            profiler.count(meals=n_food - self.food.n_alive, population=total_bacteria, colonies=len(colonies))
+            profiler.end()
+
+        return total_bacteria
+
+
+    def check_half_life(self, total_bacteria):
+        '''
+        Describe:
+        End conditions of the competitive mode.
+
+
+        Positional arguments:
+        -> self:
+        -> total_bacteria:      total number of bacteria after the step
+
+
+        Return:
+        -> stop:                True if the simulation ends
+        -> half_life:           step of the half life or 'N/A'
+        '''
+        c = self.config
+        sizes = self.colony_sizes()
+
+        if c.relationship != 'Competitive':
+
+            return False, None
+
+        if total_bacteria <= int(0.5 * self.initial_population):    # Have half life
+
+            return True, self.step_count
+
+        elif len(sizes) == 1:
+
+            return True, 'N/A'
+
+        elif len(sizes) == 2:
+
+            # The difference between two only colonies
+            difference = abs(sizes[0] - sizes[1])
+
+            if difference >= (2 * self.initial_population):
+
+                return True, 'N/A'
+
+        return False, None
+
+
+    def check_stop(self, total_bacteria):
+        '''
+        Describe:
+        Stopping rules of the config (population cap, growth plateau, wall time and memory budgets), checked after each step.
+        Each rule only looks at numbers kept by the simulation, so checking them costs nothing next to a step.
+
+
+        Positional arguments:
+        -> self:
+        -> total_bacteria:      total number of bacteria after the step
+
+
+        Return:
+        -> stop_reason:         key of STOP_REASONS of the first rule that is met (None: go on)
+        '''
+        c = self.config
+
+        if c.max_population is not None and total_bacteria >= c.max_population:
+
+            return 'population'
+
+        if c.plateau_window and len(self.populations) > c.plateau_window + 1:
+
+            # Growth rate of the last plateau_window steps
+            populations = np.asarray(self.populations[-(c.plateau_window + 2):], dtype=float)
+            growth = np.diff(populations) / np.maximum(populations[:-1], 1)
+
+            if np.ptp(growth) <= c.plateau_tolerance:
+
+                return 'plateau'
+
+        if c.max_seconds is not None and time.perf_counter() - self.start_time >= c.max_seconds:
+
+            return 'time'
+
+        if c.max_memory is not None and self.memory() >= c.max_memory * 2**20:
+
+            return 'memory'
+
+        return None
+
+
+    def memory(self):
+        '''
+        Describe:
+        Memory of the buffers of the bacteria of all colonies in bytes.
+        '''
+
+        return sum(colony.population.nbytes() for colony in self.colonies.values())
+
+
+    def run(self, progress=False):
+        '''
+        Describe:
+        Run the simulation until the last step, until an end condition is reached or until a stopping rule of the config is
+        met (see check_stop). The reason is recorded in the result.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Keyward arguments:
+        -> progress:            show a progress bar
+
+
+        Return:
+        -> result:              Result of the simulation
+        '''
+        c = self.config
+        self.start_time = time.perf_counter()
+        self.initiate()
+        self.populations = [self.population()]
+
+        # Resume from the checkpoint of the simulation: the saved state replaces the initial one
+        if c.checkpoint is not None and os.path.exists(c.checkpoint):
+
+            self.restore(load_checkpoint(c.checkpoint))
+
+        start_step = self.step_count + 1
+
+        for observer in self.observers:
+
+            observer.start(self)
+
+        steps = range(start_step, c.n_step + 1)
+
+        if progress:
+
+            from tqdm import tqdm
+            steps = tqdm(steps, desc='Step', unit='step')
+
+        half_life = None
+        stop_reason = 'n_step'
+
+        # Step through the simulation
+        for step in steps:
+
+            total_bacteria = self.advance(step)
+            self.populations.append(total_bacteria)
+
+            for observer in self.observers:
+
+                if observer.every and step % observer.every == 0:
+
+                    observer.step(self, step)
+
+            # If the bacteria all die, end the simulation and get to the next strip combination.
+            if total_bacteria == 0:
+
+                stop_reason = 'extinct'
+                break
+
+            # Save the state of the simulation every checkpoint_every steps
+            if c.checkpoint is not None and step % c.checkpoint_every == 0:
+
+                save_checkpoint(c.checkpoint, self.state())
+
+            stop, half_life = self.check_half_life(total_bacteria)
+
+            if stop:
+
+                stop_reason = 'no_half_life' if half_life == 'N/A' else 'half_life'
+                break
+
+            # Stop early when the outcome is decided or a budget is spent
+            rule = self.check_stop(total_bacteria)
+
+            if rule is not None:
+
+                stop_reason = rule
+
+                # The run is not finished: save it, so the next run goes on from this step
+                if rule in BUDGET_STOPS and c.checkpoint is not None:
+
+                    save_checkpoint(c.checkpoint, self.state())
+
+                break
+
+        self.close()
+        result = Result(half_life, self.step_count, self.population(), len(self.colony_sizes()), self.overlap_rounds,
+                        stop_reason)
+
+        for observer in self.observers:
+
+            observer.end(self, result)
+
+        return result
+
+
+def make_simulation(config, observers=(), profiler=None):
+    '''
+    Describe:
+    Create the simulation with the engine chosen in the config.
+
+
+    Positional arguments:
+    -> config:              Config of the simulation
+
+
+    Keyward arguments:
+    -> observers:           list of Observer
+    -> profiler:            StepProfiler (None: off)
+
+
+    Return:
+    -> Simulation (engine 'colonies') or WorldSimulation (engine 'world')
+    '''
+    if config.engine == 'world':
+
+        from world import WorldSimulation
+
+        return WorldSimulation(config, observers, profiler)
+
+    return Simulation(config, observers, profiler)
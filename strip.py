@@ -1,6 +1,11 @@
 import numpy as np
 
 
+# Lookup table of region parity for every int8 region id
+# Odd number: uncoated; Even number: coated
+COATED = np.arange(128) % 2 == 0
+
+
 def strip(N_size, d_size, L, increment):
     '''
     Describe:
@@ -17,7 +22,7 @@ def strip(N_size, d_size, L, increment):
     
     Return:
     -> N_d_d2_y:          tuple with [0]: (N_size * d_size, 1) array with (N, d, d2)  <-- array 
-                                     [1]: (N_size * d_size, 1) array with (y coordinates from 0 to 10)  <-- list
+                                     [1]: (N_size * d_size, 1) array with (y coordinates from 0 to 10)  <-- list of arrays
     '''
 
     # Create the combination of N and d.
@@ -55,7 +60,7 @@ def strip(N_size, d_size, L, increment):
                 y += d_d2[n]
                 points_y.append(y)
 
-            vertices_y_total.append(points_y)
+            vertices_y_total.append(np.asarray(points_y))
 
         N_d_d2_total.append(N_d_d2)
 
@@ -64,3 +69,23 @@ def strip(N_size, d_size, L, increment):
     
     return (N_d_d2_total, vertices_y_total)
 
+
+def region_check(y, vertices_y):
+    '''
+    Describe:
+    Find the region of each y coordinate with a binary search in the sorted y coordinates of the strip vertices. The region is
+    the number of vertices below the y coordinate.
+    Odd number: uncoated; Even number: coated (use COATED as the lookup table)
+    Start from 1 (0, d2)
+
+
+    Positional arguments:
+    -> y:                 array of y coordinates
+    -> vertices_y:        sorted y coordinates of the strip vertices from strip
+
+
+    Return:
+    -> regions:           int8 array of the region of each y coordinate
+    '''
+
+    return np.searchsorted(vertices_y, y, side='left').astype(np.int8)
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from bacteria import cli
+
+CONFIG = '''
+[simulation]
+n_step = 15
+n_colony = 3
+n_bacteria = 30
+n_food = 300
+x_low = 0
+x_high = 10
+y_low = 0
+y_high = 10
+radius = 2
+eat_distance = 1
+k_die_0 = 5
+k_duplicate = 5
+k_move = 50
+mu = 0
+std = 1
+born_radius = 0.001
+relationship = "Competitive"
+seed = 1
+
+[strips]
+N_size = 1
+d_size = 2
+
+[sweep]
+test_step = 1
+'''
+
+
+def test_sweep_seed(tmp_path):
+
+    config = tmp_path / 'config.toml'
+    config.write_text(CONFIG)
+    outputs = list()
+
+    # Seed in [simulation] alone, then overridden by --seed, then in both [simulation] and [sweep], then another seed
+    for name, argv, text in (('simulation', [], CONFIG),
+                             ('option', ['--seed', '1'], CONFIG.replace('seed = 1', 'seed = 2')),
+                             ('sweep', [], CONFIG.replace('seed = 1', 'seed = 2') + 'seed = 1\n'),
+                             ('other', [], CONFIG.replace('seed = 1', 'seed = 2'))):
+
+        config.write_text(text)
+        output = tmp_path / '{}.csv'.format(name)
+
+        assert cli(['sweep', str(config), '--workers', '1', '--output', str(output)] + argv) == 0
+
+        outputs.append(pd.read_csv(output))
+
+    pd.testing.assert_frame_equal(outputs[0], outputs[1])
+    pd.testing.assert_frame_equal(outputs[0], outputs[2])
+    assert not outputs[0].equals(outputs[3])
@@ -0,0 +1,27 @@
+import pytest
+
+from simulation import Config, make_simulation
+from strip import strip
+
+
+def run(engine, n_step, **options):
+
+    vertices_y = strip(5, 5, 10, 10 / 25)[1][12]
+    config = Config(n_step=n_step, vertices_y=vertices_y, seed=4, engine=engine, checkpoint_every=3, **options)
+
+    return make_simulation(config).run()
+
+
+@pytest.mark.parametrize('engine', ['colonies', 'world'])
+def test_resume(tmp_path, engine):
+
+    checkpoint = str(tmp_path / 'simulation.pkl')
+    full = run(engine, 6)
+
+    # The first run saves its state at step 3, the second one resumes from it
+    run(engine, 4, checkpoint=checkpoint)
+    resumed = run(engine, 6, checkpoint=checkpoint)
+
+    assert resumed.steps == full.steps
+    assert resumed.population == full.population
+    assert resumed.overlap_rounds == full.overlap_rounds
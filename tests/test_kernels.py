@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('numba')
+
+import kernels
+from kernels import select
+import kernels_numba
+import movement
+from benchmark import synthetic_colonies
+from simulation import Config, make_simulation
+from strip import strip
+
+STEP = 10
+
+
+@pytest.fixture
+def colony():
+    '''
+    Describe:
+    Seeded synthetic colony with the edge cases of the kernels: bacteria born in this step (age 0), bacteria which ate in
+    this step and bacteria without neighbours.
+    '''
+    colonies, _, world = synthetic_colonies(2000, seed=0, step=STEP)
+    colony = colonies[0]
+    colony.birth_date[:50] = STEP
+    colony.steps_eat[50:100] = STEP
+    colony.neighbours[100:150] = 0
+    colony.steps_eat[100:125] = np.inf
+    colony.population.touch()
+
+    return colony, world
+
+
+def test_vital_rates(colony):
+
+    colony, _ = colony
+    arguments = (STEP, colony.birth_date, colony.steps_eat, colony.neighbours, 3, 5)
+
+    expected = kernels.vital_rates(*arguments)
+
+    for reference, compiled in zip(expected, kernels_numba.vital_rates(*arguments)):
+
+        assert reference.dtype == compiled.dtype
+        np.testing.assert_array_equal(reference, compiled)
+
+    # Age 0 and a meal in this step keep the strength finite; no neighbours gives certain death
+    assert np.isfinite(expected[1]).all()
+    assert np.isinf(expected[2][100:125]).all()
+
+
+def test_choose_actions(colony):
+
+    colony, _ = colony
+
+    _, _, death_rate = kernels.vital_rates(STEP, colony.birth_date, colony.steps_eat, colony.neighbours, 3, 5)
+
+    u = np.random.default_rng(1).random(len(death_rate))
+
+    expected = kernels.choose_actions(death_rate, 5, 50, u)
+
+    np.testing.assert_array_equal(expected, kernels_numba.choose_actions(death_rate, 5, 50, u))
+    assert (expected[100:125] == 1).all()
+
+
+def test_certain_death():
+
+    # Inf death rates (no neighbours) among finite ones, without any floating point warning
+    death_rate = np.array([np.inf, 0, 0.5, np.inf, 5, 0], dtype=np.float32)
+    u = np.array([0.99, 0.5, 0.005, 0, 0.95, 0.05])
+
+    with np.errstate(all='raise'):
+
+        actions = [select(kernels.choose_actions, backend)(death_rate, 5, 50, u) for backend in kernels.BACKENDS]
+
+    np.testing.assert_array_equal(actions[0], [1, 3, 1, 1, 3, 2])
+    np.testing.assert_array_equal(actions[0], actions[1])
+
+
+def test_choose_food():
+
+    rng = np.random.default_rng(3)
+    n_food, n_bacteria = 300, 200
+    pairs = np.unique(np.column_stack([rng.integers(0, n_food, 5000), rng.integers(0, n_bacteria, 5000)]), axis=0)
+    food_index, bacteria_index = rng.permutation(pairs).T
+    r = rng.random(len(food_index))
+
+    # Ties of the random numbers go to the first pair, as in the stable sort
+    r[10:20] = r[0]
+    expected = kernels.choose_food(food_index, bacteria_index, r, n_bacteria, n_food)
+
+    for reference, compiled in zip(expected, kernels_numba.choose_food(food_index, bacteria_index, r, n_bacteria, n_food)):
+
+        np.testing.assert_array_equal(reference, compiled)
+
+
+def test_displace(colony):
+
+    colony, world = colony
+    rng = np.random.default_rng(2)
+    index = np.flatnonzero(rng.random(len(colony.points)) < 0.8)
+    magnitude = rng.normal(0, 1, len(index))
+    angle = 2*np.pi * rng.random(len(index))
+    outputs = list()
+
+    for displace in (movement.displace, kernels_numba.displace):
+
+        points, regions = colony.points.copy(), colony.regions.copy()
+        n_moved = displace(points, regions, index, magnitude, angle, world['vertices_y'], 0, world['L'], 0, world['L'])
+        outputs.append((n_moved, points, regions))
+
+    (n_reference, points_reference, regions_reference), (n_compiled, points_compiled, regions_compiled) = outputs
+
+    assert n_reference == n_compiled
+    np.testing.assert_array_equal(points_reference, points_compiled)
+    np.testing.assert_array_equal(regions_reference, regions_compiled)
+
+
+@pytest.mark.parametrize('engine', ['colonies', 'world'])
+@pytest.mark.parametrize('relationship', ['Synergistic', 'Competitive'])
+@pytest.mark.parametrize('threads', [1, 4])
+def test_seeded_run(engine, relationship, threads):
+
+    vertices_y = strip(5, 5, 10, 10 / 25)[1][12]
+    populations = list()
+
+    # With threads, the kernels of the colonies run on the thread pool at the same time
+    for backend in ('numpy', 'numba'):
+
+        config = Config(n_step=8, vertices_y=vertices_y, relationship=relationship, seed=3, engine=engine, backend=backend,
+                        threads=threads)
+        simulation = make_simulation(config)
+
+        simulation.run()
+
+        populations.append(simulation.populations)
+
+    assert populations[0] == populations[1]
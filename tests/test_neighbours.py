@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from neighbours import Neighbours
+
+
+def test_unchanged():
+
+    points = np.random.default_rng(0).random((500, 2)).astype(np.float32)
+    counter = Neighbours()
+    counts = counter.count(points)
+    tri = counter.tri
+
+    np.testing.assert_array_equal(counter.count(points.copy()), counts)
+    assert counter.tri is tri
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_remove(seed):
+
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(20, 3000))
+    points = (rng.random((n, 2)) * rng.uniform(1, 20)).astype(np.float32)
+
+    # Some bacteria on top of others, which are not vertices of the triangulation
+    points[-5:] = points[:5]
+    keep = rng.random(n) > rng.uniform(0.01, 0.2)
+    counter = Neighbours()
+    counter.count(points)
+    counter.remove(keep)
+
+    np.testing.assert_array_equal(counter.count(points[keep]), Neighbours().count(points[keep]))
+
+
+def test_small():
+
+    counter = Neighbours()
+
+    # Three bacteria form a triangle unless they are exactly on one line, however flat the triangle is
+    np.testing.assert_array_equal(counter.count(np.array([[0, 0], [1, 1e-9], [2, 0]])), [2, 2, 2])
+    np.testing.assert_array_equal(counter.count(np.array([[0, 0], [2, 0], [1, 0]])), [1, 1, 2])
+    np.testing.assert_array_equal(counter.count(np.array([[0, 0], [1, 1]])), [1, 1])
+
+    # Nearly on one line, as the Voronoi diagram counts them
+    rng = np.random.default_rng(1)
+
+    for _ in range(200):
+
+        points = np.column_stack([rng.random(3), 1e-12 * (1 + rng.random(3)) * [1, -1, 1]])
+
+        np.testing.assert_array_equal(Neighbours().count(points), [2, 2, 2])
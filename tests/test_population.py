@@ -0,0 +1,72 @@
+import numpy as np
+
+from benchmark import synthetic_colonies
+from population import Population
+from world import World
+
+
+def colony(n, seed=0):
+
+    population = Population(n)
+    population.append(n, points=np.random.default_rng(seed).random((n, 2)))
+
+    return population
+
+
+def test_members():
+
+    population = colony(10)
+    members = population.members
+
+    # Writing attributes does not change which bacteria there are
+    population.view('regions')[:] = 1
+    population.touch()
+    assert population.members == members
+
+    population.append(2)
+    assert population.members == members + 1
+    population.compact(np.arange(12) % 2 == 0)
+    assert population.members == members + 2
+    population.swap_remove([0])
+    assert population.members == members + 3
+
+
+def test_world_groups():
+
+    world = World()
+    world.add_colony(colony(10, 1))
+    world.add_colony(colony(5, 2))
+    keys, members = world.groups()
+
+    # Neighbours, regions and meals do not group the bacteria again
+    world.regions = 1
+    world.neighbours = 3
+    world.steps_eat = 0
+    assert world.groups()[1] is members
+
+    world.merge(0, 1)
+    keys, members = world.groups()
+    assert keys == [0]
+    assert len(members[0]) == 15
+
+
+def test_moves():
+
+    colonies, _, world = synthetic_colonies(200, seed=0)
+    colony = colonies[0]
+    vertices, _ = colony.hull()
+
+    # Regions, neighbours and meals keep the hull
+    colony.region_check(world['vertices_y'])
+    colony.calNeighbours()
+    colony.steps_eat = 3
+    assert colony.hull()[0] is vertices
+
+    # A displacement in which no bacteria moves keeps it too
+    colony.actions = 1
+    colony.displacement(0, 1, world['vertices_y'], 0, world['L'], 0, world['L'])
+    assert colony.hull()[0] is vertices
+
+    colony.actions = 3
+    colony.displacement(0, 1, world['vertices_y'], 0, world['L'], 0, world['L'])
+    assert colony.hull()[0] is not vertices
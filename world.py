@@ -0,0 +1,717 @@
+import numpy as np
+from Colony import hull_vertices
+from kernels import select, vital_rates, choose_actions
+from neighbours import Neighbours
+from population import Population, field
+from strip import region_check
+from movement import place_offspring, move
+from overlap_checking import overlapping_pairs, merge_groups
+from simulation import Simulation
+
+
+class World():
+    '''
+    Description:
+    All the bacteria of all the colonies in one population. Each bacteria is tagged with the colony it was born in, and a label
+    table maps that colony to the colony it belongs to now. Merging two colonies only changes the label table, so it costs
+    nothing for the bacteria. Per-colony quantities are computed on groups of the sorted colony labels, and only the
+    triangulations and the convex hulls are still computed colony by colony.
+
+
+    Attributes:
+    -> population:                              Structure-of-arrays store of all the bacteria (with their birth colony)
+    -> label:                                   birth colony -> current colony
+    -> merges:                                  number of merges (changes of the label table, for caches)
+    -> counters:                                incremental Delaunay neighbour counter of each colony
+    -> hull_cache:                              colony key -> convex hull vertices and bounding box. The colonies whose bacteria
+                                                change are removed from the cache.
+    -> group_cache:                             groups of the colonies with the members counter and the number of merges
+                                                they belong to
+    -> k_die_0:                                 death rate when there are no neighbours
+    -> backend:                                 backend of the kernels: 'numpy' or 'numba' (see kernels.py)
+    -> rates_cache:                             population version, step and number of colonies of the current vital rates
+
+
+    Buit-in methods:
+    --- add_colony:                             add the bacteria of a colony
+    --- groups:                                 colonies and the indices of their bacteria
+    --- sizes:                                  number of bacteria in each colony
+    --- merge:                                  merge a colony into another one
+    --- region_check:                           region of each bacteria
+    --- calNeighbours:                          number of neighbours of each bacteria in its colony
+    --- strength_check:                         age and strength of each bacteria
+    --- k_die:                                  death rate of each bacteria
+    --- vital_rates:                            age, strength and death rate of each bacteria (cached)
+    --- action:                                 action of each bacteria
+    --- displacement:                           move the bacteria
+    --- duplicate:                              duplicate the bacteria
+    --- die:                                    remove the dead bacteria
+    --- hulls:                                  convex hull and bounding box of each colony
+    --- overlap:                                merge or fight the overlapping colonies
+    --- fight:                                  fight between overlapping colonies
+    '''
+
+    # Per-bacteria attributes are views of the population store
+    points = field('points')
+    regions = field('regions')
+    actions = field('actions')
+    birth_date = field('birth_date')
+    ages = field('ages')
+    steps_eat = field('steps_eat')
+    neighbours = field('neighbours')
+    death_rate = field('death_rate')
+    strengths = field('strengths')
+    colony = field('colony')
+
+
+    def __init__(self, capacity=16, k_die_0=5, backend='numpy'):
+
+        self.population = Population(capacity)
+        self.label = np.zeros(0, dtype=np.int32)
+        self.merges = 0
+        self.counters = dict()
+        self.hull_cache = dict()
+        self.group_cache = None
+        self.k_die_0 = k_die_0
+        self.backend = backend
+        self.rates_cache = None
+
+        return
+
+
+    def __len__(self):
+
+        return len(self.population)
+
+
+    def add_colony(self, population):
+        '''
+        Describe:
+        Add all the bacteria of a colony with their attributes as a new colony of the world.
+
+
+        Positional arguments:
+        -> self:
+        -> population:      Population of the colony
+
+
+        Return:
+        -> key:             key of the new colony
+        '''
+        key = len(self.label)
+        self.label = np.append(self.label, np.int32(key))
+        new = self.population.extend(population)
+        self.colony[new] = key
+
+        return key
+
+
+    def groups(self):
+        '''
+        Describe:
+        Group the bacteria by colony. The groups are cached until bacteria are added or removed or the labels change: moving,
+        eating or counting neighbours does not change them.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Return:
+        -> keys:            keys of the colonies with bacteria (sorted)
+        -> members:         list of the indices of the bacteria of each colony (in the order of the population)
+        '''
+        version = (self.population.members, self.merges)
+
+        if self.group_cache is None or self.group_cache[0] != version:
+
+            ids = self.label[self.colony]
+            order = np.argsort(ids, kind='stable')
+            keys, starts = np.unique(ids[order], return_index=True)
+            members = np.split(order, starts[1:]) if len(order) != 0 else list()
+            self.group_cache = (version, keys.tolist(), members)
+
+        return self.group_cache[1], self.group_cache[2]
+
+
+    def sizes(self):
+        '''
+        Describe:
+        Number of bacteria in each colony.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Return:
+        -> dictionary: colony key -> number of bacteria
+        '''
+        keys, members = self.groups()
+
+        return {key: len(index) for key, index in zip(keys, members)}
+
+
+    def merge(self, base, other):
+        '''
+        Describe:
+        Merge a colony into the base colony by relabelling it. No bacteria are copied.
+
+
+        Positional arguments:
+        -> self:
+        -> base:            key of the colony which stays
+        -> other:           key of the colony which is merged and disappears
+
+
+        Return:
+        None
+        '''
+        self.label[self.label == other] = base
+        self.counters.pop(other, None)
+        self.hull_cache.pop(base, None)
+        self.hull_cache.pop(other, None)
+        self.merges += 1
+
+        return
+
+
+    def region_check(self, vertices_y):
+        '''
+        Describe:
+        Calculate the region of each bacteria with a binary search. Odd number: uncoated; Even number: coated.
+
+
+        Positional arguments:
+        -> self:
+        -> vertices_y:      sorted y coordinates of the strip vertices
+
+
+        Return:
+        None
+        '''
+        self.regions = region_check(self.points[:, 1], vertices_y)
+
+        return
+
+
+    def calNeighbours(self, executor=None):
+        '''
+        Describe:
+        Calculate the number of neighbours of each bacteria among the bacteria of its colony. Each colony keeps its own
+        incremental Delaunay triangulation.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Keyward arguments:
+        -> executor:        thread pool triangulating the colonies at the same time (None: one after the other)
+
+
+        Return:
+        None
+        '''
+        keys, members = self.groups()
+        neighbours = self.neighbours
+        counters = [self.counters.setdefault(key, Neighbours()) for key in keys]
+        points = [self.points[index] for index in members]
+        counts = (map if executor is None else executor.map)(Neighbours.count, counters, points)
+
+        for index, count in zip(members, counts):
+
+            neighbours[index] = count
+
+        self.population.touch()
+
+        # Counters of the colonies which died out
+        for key in set(self.counters) - set(keys):
+
+            del self.counters[key]
+
+        return
+
+
+    def strength_check(self, step):
+        '''
+        Describe:
+        Calculate the age and the strength of all bacteria based on their age, the number of colonies and steps_eat.
+
+
+        Positional arguments:
+        -> self:
+        -> step:            current step
+
+
+        Return:
+        None
+        '''
+        self.vital_rates(step)
+
+        return
+
+
+    def k_die(self, step):
+        '''
+        Describe:
+        Assign each bacteria a death rate based on its neighbours. Bacteria which have eaten in the last 10 steps do not die.
+
+
+        Positional arguments:
+        -> self:
+        -> step:            current step
+
+
+        Return:
+        None
+        '''
+        self.vital_rates(step)
+
+        return
+
+
+    def vital_rates(self, step):
+        '''
+        Describe:
+        Age, strength and death rate of all the bacteria in one pass (see kernels.py), computed again only when the bacteria,
+        the step or the number of colonies change.
+
+
+        Positional arguments:
+        -> self:
+        -> step:            current step
+
+
+        Return:
+        None
+        '''
+        keys, _ = self.groups()
+        key = (self.population.version, step, len(keys))
+
+        if self.rates_cache != key:
+
+            kernel = select(vital_rates, self.backend)
+            self.ages, self.strengths, self.death_rate = kernel(step, self.birth_date, self.steps_eat, self.neighbours, len(keys),
+                                                                self.k_die_0)
+            self.rates_cache = key
+
+        return
+
+
+    def action(self, k_duplicate, k_move, rng):
+        '''
+        Describe:
+        Choose the action of each bacteria. 1: die; 2: duplicate; 3: move
+
+
+        Positional arguments:
+        -> self:
+        -> k_duplicate:     duplicate rate
+        -> k_move:          move rate
+        -> rng:             random Generator
+
+
+        Return:
+        None
+        '''
+        # One uniform draw for each bacteria compared with the cumulative probability of each action
+        u = rng.random(len(self.death_rate))
+        self.actions = select(choose_actions, self.backend)(self.death_rate, k_duplicate, k_move, u)
+
+        return
+
+
+    def displacement(self, mu, std, vertices_y, x_low, x_high, y_low, y_high, rng):
+        '''
+        Describe:
+        Move the bacteria which are required to move (3: move). Bacteria in the coated region cannot move out of the region and
+        no bacteria can move out of the playground.
+
+
+        Positional arguments:
+        -> self:
+        -> mu:              the mean of the Gaussian distribution
+        -> std:             the standard deviation of the Gaussian distribution
+        -> vertices_y:      y coordinates of the strip vertices
+        -> x_low:           lowest limit of x-dimension of the playground
+        -> x_high:          highest limit of x-dimension of the playground
+        -> y_low:           lowest limit of y-dimension of the playground
+        -> y_high:          highest limit of y-dimension of the playground
+        -> rng:             random Generator
+
+
+        Return:
+        None
+        '''
+        n_moved = move(self.points, self.regions, self.actions == 3, mu, std, vertices_y, x_low, x_high, y_low, y_high, rng,
+                       self.backend)
+        self.population.touch(moved=n_moved > 0)
+
+        if n_moved > 0:
+
+            self.hull_cache = dict()
+
+        return
+
+
+    def duplicate(self, food, eat_distance, step, vertices_y, born_radius, x_low, x_high, y_low, y_high, rng, executor=None):
+        '''
+        Describe:
+        Bacteria that require to duplicate (2: duplicate) generate another bacteria of the same colony around them. The new
+        bacteria eat the food around them.
+
+
+        Positional arguments:
+        -> self:
+        -> food:            Food store
+        -> eat_distance:    distance in which bacteria can eat food
+        -> step:            current step
+        -> vertices_y:      y coordinates of the strip vertices
+        -> born_radius:     distance in which duplicated bacteria are
+        -> x_low:           lowest limit of x-dimension of the playground
+        -> x_high:          highest limit of x-dimension of the playground
+        -> y_low:           lowest limit of y-dimension of the playground
+        -> y_high:          highest limit of y-dimension of the playground
+        -> rng:             random Generator
+
+
+        Keyward arguments:
+        -> executor:        thread pool triangulating the colonies at the same time (None: one after the other)
+
+
+        Return:
+        None
+        '''
+        parents = np.flatnonzero(self.actions == 2)
+
+        if len(parents) == 0:
+
+            return
+
+        new_positions, new_regions = place_offspring(self.points[parents], self.regions[parents], born_radius, vertices_y,
+                                                     x_low, x_high, y_low, y_high, rng)
+
+        self.hull_cache = dict()
+        new_born = self.population.append(len(parents), points=new_positions, regions=new_regions, birth_date=step,
+                                          colony=self.colony[parents])
+
+        self.calNeighbours(executor)
+        self.strength_check(step)
+
+        # The new born bacteria eat food
+        ate = food.eat(self.points[new_born], eat_distance, rng)
+        self.steps_eat[new_born][ate] = step
+        self.population.touch()
+
+        return
+
+
+    def die(self):
+        '''
+        Describe:
+        Remove the dead bacteria (1: die) in one compaction. They are also removed from the triangulation of their colony.
+        '''
+        keep = self.actions != 1
+        keys, members = self.groups()
+
+        for key, index in zip(keys, members):
+
+            if key in self.counters:
+
+                self.counters[key].remove(keep[index])
+
+        self.population.compact(keep)
+        self.hull_cache = dict()
+
+        return
+
+
+    def hulls(self, executor=None):
+        '''
+        Describe:
+        Convex hull vertices and bounding box of each colony. They are cached and only computed again for the colonies whose
+        bacteria have changed.
+
+
+        Positional arguments:
+        -> self:
+
+
+        Keyward arguments:
+        -> executor:        thread pool computing the hulls of the colonies at the same time (None: one after the other)
+
+
+        Return:
+        -> keys:            keys of the colonies
+        -> vertices_set:    vertices of the convex hull of each colony
+        -> boxes:           bounding boxes of the colonies (x_min, y_min, x_max, y_max)
+        '''
+        keys, members = self.groups()
+        cache = self.hull_cache
+        missing = [(key, index) for key, index in zip(keys, members) if key not in cache]
+        points = [self.points[index] for _, index in missing]
+
+        for (key, _), hull in zip(missing, (map if executor is None else executor.map)(hull_vertices, points)):
+
+            cache[key] = hull
+
+        return keys, [cache[key][0] for key in keys], [cache[key][1] for key in keys]
+
+
+    def overlap(self, step, relationship, inner_step, rng):
+        '''
+        Describe:
+        Resolve the overlaps of the colonies in rounds, as overlap_checking.overlap. Synergistic colonies connected by overlaps
+        are merged by relabelling; competitive colonies fight in all overlapping pairs.
+
+
+        Positional arguments:
+        -> self:
+        -> step:            current step
+        -> relationship:    relationship between two colonies
+        -> inner_step:      pseudo steps
+        -> rng:             random Generator for the fights
+
+
+        Return:
+        -> inner_step:      pseudo steps after the fights
+        -> rounds:          number of rounds needed to resolve all overlaps
+        '''
+        rounds = 0
+
+        while True:
+
+            keys, vertices_set, boxes = self.hulls()
+
+            # EXIT. Only one colony left.
+            if len(keys) <= 1:
+
+                break
+
+            pairs = overlapping_pairs(keys, vertices_set, boxes)
+
+            # EXIT. No colonies overlap
+            if len(pairs) == 0:
+
+                break
+
+            rounds += 1
+
+            if relationship == 'Synergistic':
+
+                for base, group in merge_groups(keys, pairs).items():
+
+                    for key in group:
+
+                        self.merge(base, key)
+
+            else:
+
+                inner_step = self.fight(step, pairs, inner_step, rng)
+
+        self.strength_check(step)
+
+        return inner_step, rounds
+
+
+    def fight(self, step, pairs, inner_step, rng):
+        '''
+        Describe:
+        Fight between overlapping colonies, as fight.fight. Each colony picks distinct fighters (a bacteria fights at most once
+        in a round), all duels are settled with one Bernoulli draw and the victims are removed in one compaction.
+
+
+        Positional arguments:
+        -> self:
+        -> step:            current step
+        -> pairs:           pairs of overlapping colony keys
+        -> inner_step:      pseudo evolution step
+        -> rng:             random Generator
+
+
+        Return:
+        -> inner_step:      pseudo steps after the fights
+        '''
+        self.strength_check(step)
+        keys, members = self.groups()
+        members = dict(zip(keys, members))
+
+        sides = np.asarray(pairs).reshape(-1)                   # colony on each side (2 x n_pairs)
+        fighters = np.full(len(sides), -1)                      # chosen bacteria on each side (-1: none left)
+
+        for key in dict.fromkeys(sides.tolist()):
+
+            slots = np.flatnonzero(sides == key)
+            n_chosen = min(len(slots), len(members[key]))
+            fighters[slots[:n_chosen]] = members[key][rng.choice(len(members[key]), n_chosen, replace=False)]
+
+        fighters = fighters.reshape(-1, 2)
+        fighters = fighters[np.all(fighters >= 0, axis=1)]
+
+        # The probability to survive is based on the strengths
+        strength_0 = self.strengths[fighters[:, 0]].astype(float)
+        strength_1 = self.strengths[fighters[:, 1]].astype(float)
+        survivor_0 = rng.random(len(fighters)) < strength_0 / (strength_0 + strength_1)
+
+        victims = np.where(survivor_0, fighters[:, 1], fighters[:, 0])
+
+        # Only the colonies which lost bacteria change their hulls
+        for key in np.unique(self.label[self.colony[victims]]).tolist():
+
+            self.hull_cache.pop(key, None)
+
+        survivors = np.ones(len(self), dtype=bool)
+        survivors[victims] = False
+        self.population.compact(survivors)
+
+        return inner_step + len(fighters)
+
+
+class WorldSimulation(Simulation):
+    '''
+    Description:
+    Simulation on the World engine: every phase of a step runs once over all the bacteria instead of once for each colony. It
+    is started and ended the same way as Simulation (same colonies and food for the same seed), but all the draws of a step
+    come from one random stream, so the runs are not the same as with the colony engine.
+    '''
+
+
+    def initiate(self):
+        '''
+        Describe:
+        Create the colonies as Simulation does and move their bacteria with all their attributes into the world.
+        '''
+        c = self.config
+        Simulation.initiate(self)
+
+        self.world = World(c.n_colony * c.n_bacteria, c.k_die_0, c.backend)
+
+        for colony in self.colonies.values():
+
+            self.world.add_colony(colony.population)
+
+        # The colonies now live in the world
+        self.colonies = dict()
+
+        return
+
+
+    def population(self):
+
+        return len(self.world)
+
+
+    def colony_sizes(self):
+
+        return list(self.world.sizes().values())
+
+
+    def shapes(self):
+
+        _, vertices_set, _ = self.world.hulls()
+        _, members = self.world.groups()
+
+        return [(self.world.points[index], vertices) for index, vertices in zip(members, vertices_set)]
+
+
+    def state(self):
+
+        return (self.world, self.food, self.step_count, self.rng, self.populations, self.overlap_rounds)
+
+
+    def restore(self, state):
+
+        self.world, self.food, self.step_count, self.rng, self.populations, self.overlap_rounds = state
+
+        return
+
+
+    def memory(self):
+
+        return self.world.population.nbytes()
+
+
+    def advance(self, step):
+        '''
+        Describe:
+        Run one step of the simulation on the world: resolve overlaps, then every bacteria eats, chooses and takes its action.
+
+
+        Positional arguments:
+        -> self:
+        -> step:                current step
+
+
+        Return:
+        -> total_bacteria:      total number of bacteria after the step
+        '''
+        c = self.config
+        world = self.world
+        phase = self.phase
+        profiler = self.profiler
+
+        if profiler is not None:
+
+            profiler.begin(step)
+            n_colonies = len(world.sizes())
+            n_food = self.food.n_alive
+
+        # The convex hulls of all colonies are computed at the same time first
+        with phase('overlap'):
+
+            world.hulls(self.pool())
+            inner_step, rounds = world.overlap(step, c.relationship, step, self.rng)
+
+        self.overlap_rounds.append(rounds)
+
+        with phase('region_check'):
+
+            world.region_check(c.vertices_y)
+
+        with phase('calNeighbours'):
+
+            world.calNeighbours(self.pool())
+
+        # All bacteria eat in one batched pass
+        with phase('eat'):
+
+            world.steps_eat[self.food.eat(world.points, c.eat_distance, self.rng)] = step
+            world.population.touch()
+
+        with phase('k_die'):
+
+            world.k_die(step)
+
+        with phase('action'):
+
+            world.action(c.k_duplicate, c.k_move, self.rng)
+
+        if profiler is not None:
+
+            profiler.count(births=np.count_nonzero(world.actions == 2), deaths=np.count_nonzero(world.actions == 1),
+                           fights=inner_step - step,
+                           merges=n_colonies - len(world.sizes()) if c.relationship == 'Synergistic' else 0)
+
+        with phase('displacement'):
+
+            world.displacement(c.mu, c.std, c.vertices_y, c.x_low, c.x_high, c.y_low, c.y_high, self.rng)
+
+        with phase('duplicate'):
+
+            world.duplicate(self.food, c.eat_distance, step, c.vertices_y,
+                            c.born_radius, c.x_low, c.x_high, c.y_low, c.y_high, self.rng, self.pool())
+
+        with phase('die'):
+
+            world.die()
+
+        self.step_count = step
+        total_bacteria = len(world)
+
+        if profiler is not None:
+
+            profiler.count(meals=n_food - self.food.n_alive, population=total_bacteria, colonies=len(world.sizes()))
+            profiler.end()
+
+        return total_bacteria